@@ -1,11 +1,31 @@
+import os
 from sys import *
 from interpreter import *
 
+# output_formats lives next to the syntax analyzer
+ANALYZER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "syntax.analyzer")
+
+def write_records(source, fmt):
+    from output_formats import RecordWriter, lex_records
+
+    writer = RecordWriter(fmt)
+    writer.write_all(lex_records(source))
+    writer.close()
+
 if __name__ == '__main__':
-    if len(argv) > 1:
-        print("\n".join([str(item) for item in parse(argv[1])]))
-    else:
+    args = argv[1:]
+    fmt = "text"
+    if any(arg.startswith("--format") for arg in args):
+        path.append(ANALYZER_DIR)
+        from output_formats import split_format_arg
+        fmt, args = split_format_arg(args)
+
+    if not args:
         print("No input provided.")
+    elif fmt == "text":
+        print("\n".join([str(item) for item in parse(args[0])]))
+    else:
+        write_records(args[0], fmt)
 
 
 
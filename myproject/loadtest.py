@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+"""
+Load generator for the JARGEN analysis endpoints (standard library only).
+
+Start the server first, e.g.
+    py manage.py runserver --noreload
+and then run
+    py loadtest.py --concurrency 8 --requests 500 --mix form=1,api=3
+
+Request kinds in --mix:
+  - page : GET /                   (the analyzer form)
+  - form : POST / with user_input  (the form view, with a CSRF token)
+  - api  : POST /api/analyze       (JSON endpoint)
+
+Each POST sends a generated JARGEN program whose size is drawn from
+--min-lines..--max-lines. By default every program is unique so the result
+cache is bypassed; use --pool N to cycle through N programs instead.
+Switch JARGEN_ANALYSIS_BACKEND in settings.py to compare the subprocess and
+in-process analyzers under the same load.
+"""
+import argparse
+import http.client
+import json
+import random
+import re
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+# ----------------------------------------------------------------
+# Program generator
+# ----------------------------------------------------------------
+def generate_program(rng, n_lines, tag):
+    """
+    Build a syntactically valid JARGEN program of roughly n_lines lines.
+    `tag` is mixed into the identifiers so that programs are unique.
+    """
+    lines = [f"flex total{tag} = 0"]
+    while len(lines) < n_lines:
+        kind = rng.randrange(4)
+        name = f"v{tag}x{len(lines)}"
+        if kind == 0:
+            lines.append(f"flex {name} = {rng.randint(0, 999)}")
+        elif kind == 1:
+            lines.append(f"{name} = {rng.randint(1, 99)} + {rng.randint(1, 99)}.{rng.randint(0, 9)} * total{tag}")
+        elif kind == 2:
+            lines.append(f"sus(total{tag} > {rng.randint(0, 50)}) {{")
+            lines.append(f"total{tag} = total{tag} - {rng.randint(1, 9)}")
+            lines.append("}")
+        else:
+            lines.append(f"forreal(i = 0; i < {rng.randint(1, 20)}; i++) {{")
+            lines.append(f'spill("{name}")')
+            lines.append("}")
+    # The lexer's block check wants the program to end with a closing brace.
+    if lines[-1] != "}":
+        lines.append(f"sus(total{tag} < 0) {{")
+        lines.append(f"total{tag} = 0")
+        lines.append("}")
+    return "\n".join(lines)
+
+
+# ----------------------------------------------------------------
+# Client
+# ----------------------------------------------------------------
+class Client:
+    """
+    One keep-alive HTTP connection plus the CSRF state for the form view.
+    """
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.conn = None
+        self.csrf_token = None
+        self.cookie = None
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+        for header, value in response.getheaders():
+            if header.lower() == "set-cookie" and value.startswith("csrftoken="):
+                self.cookie = value.split(";", 1)[0]
+        return response.status, response, data
+
+    def page(self, source):
+        status, response, data = self.request("GET", "/")
+        match = CSRF_INPUT.search(data.decode("utf-8", "replace"))
+        if match:
+            self.csrf_token = match.group(1)
+        return status, response
+
+    def form(self, source):
+        if self.csrf_token is None:
+            self.page(source)
+        body = urlencode({"csrfmiddlewaretoken": self.csrf_token or "", "user_input": source})
+        status, response, data = self.request(
+            "POST", "/", body=body,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        return status, response
+
+    def api(self, source):
+        body = json.dumps({"source": source})
+        status, response, data = self.request(
+            "POST", "/api/analyze", body=body,
+            headers={"Content-Type": "application/json"},
+        )
+        return status, response
+
+
+# ----------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}  # kind -> [seconds]
+        self.statuses = {}  # (kind, status) -> count
+        self.cache = {}  # X-Cache value -> count
+        self.failures = 0
+
+    def record(self, kind, seconds, status, cache_status):
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(seconds)
+            self.statuses[(kind, status)] = self.statuses.get((kind, status), 0) + 1
+            if cache_status:
+                self.cache[cache_status] = self.cache.get(cache_status, 0) + 1
+
+    def record_failure(self, kind, seconds, error):
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(seconds)
+            self.statuses[(kind, type(error).__name__)] = self.statuses.get((kind, type(error).__name__), 0) + 1
+            self.failures += 1
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def parse_mix(text):
+    mix = []
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in {"page", "form", "api"}:
+            raise argparse.ArgumentTypeError(f"Unknown request kind '{kind}' in --mix.")
+        mix.append((kind, float(weight or 1)))
+    return mix
+
+
+def worker(args, worker_id, stats, next_request, deadline, pool):
+    rng = random.Random(args.seed + worker_id)
+    client = Client(args.host, args.port, args.timeout)
+    kinds = [kind for kind, weight in args.mix]
+    weights = [weight for kind, weight in args.mix]
+
+    while True:
+        number = next_request()
+        if number is None or (deadline and time.monotonic() > deadline):
+            return
+        kind = rng.choices(kinds, weights)[0]
+        if pool:
+            source = pool[number % len(pool)]
+        else:
+            source = generate_program(rng, rng.randint(args.min_lines, args.max_lines), f"{worker_id}n{number}")
+
+        started = time.perf_counter()
+        try:
+            status, response = getattr(client, kind)(source)
+        except (http.client.HTTPException, OSError) as e:
+            stats.record_failure(kind, time.perf_counter() - started, e)
+            continue
+        stats.record(kind, time.perf_counter() - started, status, response.getheader("X-Cache"))
+
+
+def report(stats, elapsed, out):
+    total = sum(len(values) for values in stats.latencies.values())
+    errors = stats.failures + sum(
+        count for (kind, status), count in stats.statuses.items()
+        if isinstance(status, int) and status >= 400
+    )
+    out.write(f"requests    {total}\n")
+    out.write(f"elapsed     {elapsed:.2f}s\n")
+    out.write(f"throughput  {total / elapsed if elapsed else 0:.1f} req/s\n")
+    out.write(f"errors      {errors} ({100.0 * errors / total if total else 0:.1f}%)\n")
+    if stats.cache:
+        hits = stats.cache.get("HIT", 0)
+        out.write(f"cache hits  {hits}/{sum(stats.cache.values())}\n")
+    out.write("\n")
+    out.write(f"{'kind':<8}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}\n")
+    all_values = []
+    for kind, values in sorted(stats.latencies.items()):
+        values.sort()
+        all_values.extend(values)
+        out.write(
+            f"{kind:<8}{len(values):>8}"
+            f"{percentile(values, 0.50) * 1000:>10.1f}"
+            f"{percentile(values, 0.95) * 1000:>10.1f}"
+            f"{percentile(values, 0.99) * 1000:>10.1f}"
+            f"{values[-1] * 1000:>10.1f}\n"
+        )
+    all_values.sort()
+    if all_values:
+        out.write(
+            f"{'all':<8}{len(all_values):>8}"
+            f"{percentile(all_values, 0.50) * 1000:>10.1f}"
+            f"{percentile(all_values, 0.95) * 1000:>10.1f}"
+            f"{percentile(all_values, 0.99) * 1000:>10.1f}"
+            f"{all_values[-1] * 1000:>10.1f}\n"
+        )
+    out.write("\nstatus counts\n")
+    for (kind, status), count in sorted(stats.statuses.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+        out.write(f"  {kind:<8}{status!s:<20}{count}\n")
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the JARGEN analysis endpoints.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="server base URL")
+    parser.add_argument("--concurrency", type=int, default=4, help="number of concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="total requests to send")
+    parser.add_argument("--duration", type=float, default=0, help="stop after this many seconds (0 = no limit)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("form=1,api=1"),
+                        help="weighted request kinds, e.g. page=1,form=2,api=5")
+    parser.add_argument("--min-lines", type=int, default=5, help="smallest generated program")
+    parser.add_argument("--max-lines", type=int, default=200, help="largest generated program")
+    parser.add_argument("--pool", type=int, default=0, help="reuse this many programs (exercises the cache)")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for program generation")
+    args = parser.parse_args(argv)
+
+    url = urlsplit(args.url)
+    args.host = url.hostname or "127.0.0.1"
+    args.port = url.port or 80
+
+    pool = []
+    if args.pool:
+        rng = random.Random(args.seed)
+        pool = [
+            generate_program(rng, rng.randint(args.min_lines, args.max_lines), f"p{i}")
+            for i in range(args.pool)
+        ]
+
+    counter_lock = threading.Lock()
+    issued = [0]
+
+    def next_request():
+        with counter_lock:
+            if not args.duration and issued[0] >= args.requests:
+                return None
+            issued[0] += 1
+            return issued[0]
+
+    stats = Stats()
+    started = time.monotonic()
+    deadline = started + args.duration if args.duration else None
+    threads = [
+        threading.Thread(target=worker, args=(args, i, stats, next_request, deadline, pool), daemon=True)
+        for i in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    errors = report(stats, time.monotonic() - started, sys.stdout)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Admission control for the analysis endpoint.
+
+At most MAX_IN_FLIGHT analyses run at once per worker process. Up to
+MAX_QUEUE further requests may wait for a slot, but no longer than
+MAX_QUEUE_WAIT seconds; anything beyond that is rejected straight away with
+503 so the requests that were admitted keep a predictable latency. An
+optional per-client token bucket (RATE_LIMIT requests per second, bursts of
+RATE_BURST) rejects chatty clients with 429.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+
+
+class Rejected(Exception):
+    """
+    Raised when a request is not admitted.
+      - status      : HTTP status to answer with (429 or 503)
+      - retry_after : whole seconds the client should wait before retrying
+    """
+    def __init__(self, status, retry_after, reason):
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, now):
+        """
+        Take one token. Returns 0 on success, otherwise the number of seconds
+        until a token becomes available.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    # Idle client buckets are dropped once this many clients are tracked.
+    MAX_TRACKED_CLIENTS = 10000
+
+    def __init__(self, max_in_flight, max_queue, max_queue_wait, retry_after=1,
+                 rate_limit=None, rate_burst=1):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.in_flight = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+        self._buckets = {}
+
+    def acquire(self, client=None):
+        """
+        Wait for an analysis slot. Raises Rejected if the client is over its
+        rate limit, the wait queue is full, or no slot frees up in time.
+        Every successful acquire() must be paired with a release().
+        """
+        with self._cond:
+            if self.rate_limit and client is not None:
+                wait = self._take_token(client)
+                if wait:
+                    raise Rejected(429, max(1, math.ceil(wait)), "Rate limit exceeded.")
+
+            if self.in_flight < self.max_in_flight:
+                self.in_flight += 1
+                return
+
+            if self.waiting >= self.max_queue:
+                raise Rejected(503, self.retry_after, "Analyzer is busy.")
+
+            deadline = time.monotonic() + self.max_queue_wait
+            self.waiting += 1
+            try:
+                while self.in_flight >= self.max_in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Rejected(503, self.retry_after, "Timed out waiting for the analyzer.")
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def _take_token(self, client):
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_TRACKED_CLIENTS:
+                self._prune(now)
+            bucket = self._buckets[client] = TokenBucket(self.rate_limit, self.rate_burst)
+        return bucket.take(now)
+
+    def _prune(self, now):
+        # A bucket that has refilled completely carries no state worth keeping.
+        refill = self.rate_burst / self.rate_limit
+        for client, bucket in list(self._buckets.items()):
+            if now - bucket.updated >= refill:
+                del self._buckets[client]
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+def get_controller():
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                config = settings.JARGEN_ADMISSION
+                _controller = AdmissionController(
+                    max_in_flight=config["MAX_IN_FLIGHT"],
+                    max_queue=config["MAX_QUEUE"],
+                    max_queue_wait=config["MAX_QUEUE_WAIT"],
+                    retry_after=config.get("RETRY_AFTER", 1),
+                    rate_limit=config.get("RATE_LIMIT"),
+                    rate_burst=config.get("RATE_BURST", 1),
+                )
+    return _controller
@@ -0,0 +1,156 @@
+"""
+Runs the JARGEN analyzer for the web views.
+
+settings.JARGEN_ANALYSIS_BACKEND picks how:
+  - "subprocess" : start `python syntax.analyzer/main.py <code>` per request
+                   (default)
+  - "inprocess"  : import the front end from JARGEN_ANALYZER_DIR once per
+                   worker and call it directly
+
+With JARGEN_METRICS, the per-phase, source size and token count metrics
+are only exported by the in-process backend.
+
+A run that fails (an exception in the front end, or a non-zero exit of the
+subprocess) is counted as an "internal" error in the metrics. A failed
+subprocess raises AnalyzerFailed, so that its output is shown but never
+cached.
+"""
+import subprocess
+import sys
+import threading
+import tracemalloc
+
+from django.conf import settings
+
+from .admission import get_controller
+
+_modules = None
+_load_lock = threading.Lock()
+
+# Web-side metrics, registered with the analyzer's metrics registry on load.
+CACHE_REQUESTS = None
+
+
+class AnalyzerFailed(RuntimeError):
+    """
+    The analyzer subprocess exited with an error; `output` is its stderr.
+    """
+    def __init__(self, output):
+        super().__init__(output)
+        self.output = output
+
+
+def load_analyzer():
+    """
+    Import the front end and metrics modules from JARGEN_ANALYZER_DIR.
+    Returns (frontend, metrics).
+    """
+    global _modules, CACHE_REQUESTS
+    if _modules is None:
+        with _load_lock:
+            if _modules is None:
+                analyzer_dir = str(settings.JARGEN_ANALYZER_DIR)
+                if analyzer_dir not in sys.path:
+                    sys.path.insert(0, analyzer_dir)
+                import frontend
+                import metrics
+
+                CACHE_REQUESTS = metrics.Counter(
+                    "jargen_cache_requests_total",
+                    "Analysis cache lookups by result (hit, miss).",
+                    label="result",
+                )
+                metrics.Gauge(
+                    "jargen_queue_depth",
+                    "Requests waiting for an analysis slot in this worker.",
+                    callback=lambda: get_controller().waiting,
+                )
+                metrics.Gauge(
+                    "jargen_in_flight",
+                    "Analyses currently running in this worker.",
+                    callback=lambda: get_controller().in_flight,
+                )
+                if settings.JARGEN_ANALYSIS_BACKEND != "inprocess":
+                    # The subprocess runs the lexer and parser; their
+                    # series would stay empty here.
+                    metrics.unregister(*metrics.ANALYZER_METRICS)
+                elif settings.JARGEN_METRICS:
+                    metrics.enable()
+                if settings.JARGEN_TRACE_MEMORY and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                _modules = (frontend, metrics)
+    return _modules
+
+
+def run_analyzer(user_input, profile=None):
+    """
+    Analyze `user_input` and return the output text. If `profile` (a
+    metrics.PhaseProfile) is given, the phases of the run are recorded in it.
+    """
+    if settings.JARGEN_ANALYSIS_BACKEND == "subprocess":
+        if profile is None:
+            return run_analyzer_subprocess(user_input)
+        with profile.measure("subprocess", children=True):
+            return run_analyzer_subprocess(user_input)
+
+    frontend, metrics = load_analyzer()
+    try:
+        if profile is None:
+            return frontend.analyze_source(user_input).output
+        with metrics.profile_phases(profile):
+            return frontend.analyze_source(user_input).output
+    except Exception:
+        record_internal_error()
+        raise
+
+
+def run_analyzer_subprocess(user_input):
+    # Run the Python script with the input as an argument
+    script_path = str(settings.JARGEN_ANALYZER_DIR / 'main.py')
+    process = subprocess.run(
+        ['python', script_path, user_input],
+        capture_output=True,
+        text=True
+    )
+    # Capture the script's output
+    if process.returncode != 0:
+        record_internal_error()
+        raise AnalyzerFailed(process.stderr.strip())
+    return process.stdout.strip()
+
+
+def record_internal_error():
+    if settings.JARGEN_METRICS:
+        frontend, metrics = load_analyzer()
+        metrics.ERRORS.inc("internal")
+
+
+def record_cache_lookup(status):
+    if settings.JARGEN_METRICS:
+        load_analyzer()
+        CACHE_REQUESTS.inc(status.lower())
+
+
+def new_profile():
+    frontend, metrics = load_analyzer()
+    return metrics.PhaseProfile()
+
+
+def server_timing(profile, total):
+    """
+    Format a Server-Timing header value: one entry per phase with its wall
+    time as `dur` (milliseconds) and CPU time / peak memory in `desc`.
+    """
+    entries = []
+    for phase, entry in profile.phases.items():
+        desc = f"cpu {entry['cpu'] * 1000:.3f}ms"
+        if "peak_bytes" in entry:
+            desc += f", peak {entry['peak_bytes'] / 1024:.1f}KiB"
+        entries.append(f'{phase};dur={entry["wall"] * 1000:.3f};desc="{desc}"')
+    entries.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(entries)
+
+
+def render_metrics():
+    frontend, metrics = load_analyzer()
+    return metrics.render()
@@ -0,0 +1,45 @@
+"""
+Content-addressed cache for analyzer results.
+
+Results are keyed by a hash of the submitted source plus the analyzer
+version, so every worker process can reuse a result computed by any other
+worker as long as they share the cache backend configured in
+settings.CACHES[settings.JARGEN_ANALYSIS_CACHE].
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def cache_key(source):
+    digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    return f"jargen:{settings.JARGEN_ANALYZER_VERSION}:{digest}"
+
+
+def get_cached_result(source):
+    """
+    Return the cached result for `source`, or None on a miss.
+    """
+    cache = caches[settings.JARGEN_ANALYSIS_CACHE]
+    payload = cache.get(cache_key(source))
+    if payload is None:
+        return None
+    try:
+        return json.loads(payload)["result"]
+    except (ValueError, KeyError, TypeError):
+        # A corrupt entry is treated as a miss and overwritten on the next store.
+        return None
+
+
+def store_result(source, result):
+    """
+    Store `result` for `source`. Oversized results are not cached.
+    """
+    payload = json.dumps({"result": result})
+    if len(payload) > settings.JARGEN_ANALYSIS_CACHE_MAX_RESULT_BYTES:
+        return False
+    cache = caches[settings.JARGEN_ANALYSIS_CACHE]
+    cache.set(cache_key(source), payload)
+    return True
@@ -82,6 +82,29 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# The "analysis" cache is shared by every worker process, so it lives in the
+# existing db.sqlite3 database. Create its table once with:
+#     py manage.py createcachetable
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "analysis": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "jargen_analysis_cache",
+        "TIMEOUT": 60 * 60 * 24,  # seconds an analysis result stays valid
+        "OPTIONS": {
+            "MAX_ENTRIES": 5000,  # cull once the table holds this many results
+            "CULL_FREQUENCY": 3,  # drop 1/3 of the entries when culling
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -122,6 +145,68 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static')
 ]
 
+# `py manage.py collectstatic` copies the assets here with content-hashed
+# names plus precompressed (.gz/.br) and, optionally, WebP variants; see
+# myproject/storage.py. They are served by myproject/static_serve.py with
+# far-future cache headers.
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "myproject.storage.PrecompressedManifestStaticFilesStorage",
+    },
+}
+
+# Also write .webp versions of PNG/JPEG images (requires Pillow).
+JARGEN_STATIC_WEBP = False
+
+# JARGEN analyzer
+# Bump JARGEN_ANALYZER_VERSION whenever the lexer or parser output changes so
+# that cached analysis results from the old version are no longer served.
+
+JARGEN_ANALYZER_DIR = BASE_DIR.parent / "syntax.analyzer"
+
+JARGEN_ANALYZER_VERSION = "6"
+
+# "subprocess" starts syntax.analyzer/main.py for every request; "inprocess"
+# runs the analyzer inside the worker, which also fills the per-phase
+# (lex, validate, parse) metrics and Server-Timing entries.
+JARGEN_ANALYSIS_BACKEND = "subprocess"
+
+# Serve Prometheus metrics at /metrics. When False the lexer and parser
+# instrumentation hooks stay unset and cost nothing.
+JARGEN_METRICS = True
+
+# Send a Server-Timing header (wall/CPU time per phase) with analysis
+# responses. With JARGEN_DEBUG_TIMINGS, adding ?debug=1 to a request also
+# returns the timings as JSON. JARGEN_TRACE_MEMORY adds peak traced memory
+# per phase, at a noticeable cost (it keeps tracemalloc running).
+JARGEN_SERVER_TIMING = True
+
+JARGEN_DEBUG_TIMINGS = DEBUG
+
+JARGEN_TRACE_MEMORY = False
+
+JARGEN_ANALYSIS_CACHE = "analysis"
+
+# Results larger than this (in bytes of serialized JSON) are not cached.
+JARGEN_ANALYSIS_CACHE_MAX_RESULT_BYTES = 256 * 1024
+
+# Admission control for the analysis view (limits are per worker process).
+# Set RATE_LIMIT to a number of requests per second to rate limit each client.
+
+JARGEN_ADMISSION = {
+    "MAX_IN_FLIGHT": os.cpu_count() or 1,  # analyses running at once
+    "MAX_QUEUE": 16,  # requests allowed to wait for a free slot
+    "MAX_QUEUE_WAIT": 5.0,  # seconds a request may wait before it gets a 503
+    "RETRY_AFTER": 2,  # Retry-After (seconds) sent with a 503
+    "RATE_LIMIT": None,
+    "RATE_BURST": 5,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -0,0 +1,54 @@
+"""
+Analysis-only settings for myproject.
+
+Serves just the analyzer views: no admin, auth, sessions or messages apps,
+and only the middleware and context processors those views need. Worker
+start-up skips importing the admin, and requests skip the session and
+authentication middleware.
+
+Use it by pointing Django at this module, e.g.
+    DJANGO_SETTINGS_MODULE=myproject.settings_analysis gunicorn myproject.wsgi
+    py manage.py runserver --settings=myproject.settings_analysis
+"""
+
+from .settings import *  # noqa: F401,F403
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    "django.contrib.staticfiles",
+]
+
+# CSRF protection stays: the analyzer form posts a CSRF token, which Django
+# keeps in a cookie and not in the session.
+MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+ROOT_URLCONF = "myproject.urls_analysis"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": ['templates'],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.debug",
+                "django.template.context_processors.request",
+            ],
+        },
+    },
+]
+
+AUTH_PASSWORD_VALIDATORS = []
+
+
+# Internationalization
+# The analyzer templates are not translated.
+
+USE_I18N = False
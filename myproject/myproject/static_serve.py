@@ -0,0 +1,83 @@
+"""
+In-process static file serving for collected assets (see storage.py).
+
+Serves files from STATIC_ROOT, choosing a precompressed .br/.gz variant when
+the client accepts that encoding and a .webp variant of images when the
+client accepts WebP. Content-hashed names never change content, so they are
+sent with a far-future immutable Cache-Control; anything else gets a short
+max-age.
+"""
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponseNotAllowed
+from django.utils._os import safe_join
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+SHORT_CACHE_CONTROL = "public, max-age=60"
+
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+_hashed_names = None
+
+
+def hashed_names():
+    """
+    Set of content-hashed file names from the collectstatic manifest.
+    """
+    global _hashed_names
+    if _hashed_names is None:
+        hashed_files = getattr(staticfiles_storage, "hashed_files", {}) or {}
+        _hashed_names = set(hashed_files.values())
+    return _hashed_names
+
+
+def accepts(header, token):
+    for part in header.split(","):
+        value, _, params = part.strip().partition(";")
+        if value.strip().lower() == token and params.replace(" ", "") != "q=0":
+            return True
+    return False
+
+
+def serve(request, path):
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(["GET", "HEAD"])
+
+    try:
+        full_path = safe_join(str(settings.STATIC_ROOT), path)
+    except ValueError:
+        raise Http404("Invalid static path.")
+    if not os.path.isfile(full_path):
+        raise Http404("Static file not found.")
+
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    chosen_path = full_path
+    content_encoding = None
+    vary = ["Accept-Encoding"]
+
+    if os.path.splitext(full_path)[1].lower() in {".png", ".jpg", ".jpeg"}:
+        vary.append("Accept")
+        if accepts(request.META.get("HTTP_ACCEPT", ""), "image/webp") and os.path.isfile(full_path + ".webp"):
+            chosen_path = full_path + ".webp"
+            content_type = "image/webp"
+    else:
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        for encoding, suffix in ENCODINGS:
+            if accepts(accept_encoding, encoding) and os.path.isfile(full_path + suffix):
+                chosen_path = full_path + suffix
+                content_encoding = encoding
+                break
+
+    response = FileResponse(open(chosen_path, "rb"), content_type=content_type)
+    if content_encoding:
+        response["Content-Encoding"] = content_encoding
+    response["Vary"] = ", ".join(vary)
+    if path in hashed_names():
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response["Cache-Control"] = SHORT_CACHE_CONTROL
+    return response
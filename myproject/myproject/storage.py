@@ -0,0 +1,95 @@
+"""
+Static files storage for the analyzer UI.
+
+On top of ManifestStaticFilesStorage (content-hashed file names such as
+css/style.3f2a9c1b.css), collectstatic also writes:
+  - name.gz / name.br : gzip and brotli variants of text assets, kept only
+                        when they are smaller (brotli needs the optional
+                        `brotli` package)
+  - name.webp         : a WebP re-encoding of PNG/JPEG images when
+                        settings.JARGEN_STATIC_WEBP is on and Pillow is
+                        installed, kept only when smaller
+static_serve.serve() picks the best variant for each request.
+"""
+import gzip
+import io
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg", ".html", ".txt", ".json", ".map", ".xml", ".ico"}
+
+WEBP_EXTENSIONS = {".png", ".jpg", ".jpeg"}
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        for name in sorted(set(self.hashed_files.values())):
+            extension = os.path.splitext(name)[1].lower()
+            if extension in COMPRESSIBLE_EXTENSIONS:
+                for variant in self._write_compressed(name):
+                    yield name, variant, True
+            elif extension in WEBP_EXTENSIONS and self._webp_enabled():
+                variant = self._write_webp(name)
+                if variant:
+                    yield name, variant, True
+
+    def _webp_enabled(self):
+        return Image is not None and getattr(settings, "JARGEN_STATIC_WEBP", False)
+
+    def _read(self, name):
+        with self.open(name) as f:
+            return f.read()
+
+    def _replace(self, name, data):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(data))
+
+    def _write_compressed(self, name):
+        data = self._read(name)
+        written = []
+
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data):
+            self._replace(name + ".gz", compressed)
+            written.append(name + ".gz")
+
+        if brotli is not None:
+            compressed = brotli.compress(data, mode=brotli.MODE_TEXT)
+            if len(compressed) < len(data):
+                self._replace(name + ".br", compressed)
+                written.append(name + ".br")
+
+        return written
+
+    def _write_webp(self, name):
+        data = self._read(name)
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                out = io.BytesIO()
+                image.save(out, format="WEBP", quality=85, method=6)
+        except (OSError, ValueError):
+            return None
+        encoded = out.getvalue()
+        if len(encoded) >= len(data):
+            return None
+        self._replace(name + ".webp", encoded)
+        return name + ".webp"
@@ -0,0 +1,35 @@
+"""
+Tests of the analysis views. Run from myproject/ with
+
+    python manage.py test myproject
+"""
+import re
+
+from django.test import SimpleTestCase, override_settings
+
+LOCAL_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "analysis": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests"},
+}
+
+
+@override_settings(CACHES=LOCAL_CACHES, JARGEN_ANALYSIS_BACKEND="subprocess", JARGEN_SERVER_TIMING=True)
+class SubprocessServerTimingTest(SimpleTestCase):
+    def test_subprocess_phase_counts_the_child_cpu_time(self):
+        # Enough statements that the child spends measurable CPU time.
+        source = "\n".join(f"flex x{i} = {i} + 1" for i in range(2000)) + "\n}"
+        response = self.client.post("/api/analyze", {"user_input": source})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+        match = re.search(r'subprocess;dur=[0-9.]+;desc="cpu ([0-9.]+)ms"', response["Server-Timing"])
+        self.assertIsNotNone(match, response["Server-Timing"])
+        self.assertGreater(float(match.group(1)), 0)
+
+
+@override_settings(CACHES=LOCAL_CACHES, JARGEN_ANALYSIS_BACKEND="subprocess", JARGEN_METRICS=True)
+class SubprocessMetricsTest(SimpleTestCase):
+    def test_analyzer_phase_metrics_are_not_exported(self):
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn("jargen_cache_requests_total", body)
+        self.assertNotIn("jargen_phase_seconds", body)
+        self.assertNotIn("jargen_token_count", body)
@@ -16,9 +16,12 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
-from . import views
+from . import static_serve, views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path('', views.lexical_analyzer),
+    path('api/analyze', views.analyze_api),
+    path('metrics', views.metrics),
+    path('static/<path:path>', static_serve.serve),
 ]
@@ -0,0 +1,14 @@
+"""
+URL configuration for the analysis-only profile (settings_analysis).
+
+Same analyzer routes as urls.py, without the admin site.
+"""
+from django.urls import path
+from . import static_serve, views
+
+urlpatterns = [
+    path('', views.lexical_analyzer),
+    path('api/analyze', views.analyze_api),
+    path('metrics', views.metrics),
+    path('static/<path:path>', static_serve.serve),
+]
@@ -1,6 +1,13 @@
 #from django.http import HttpResponse
+import json
+from time import perf_counter
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
-import subprocess
+from django.views.decorators.csrf import csrf_exempt
+from .admission import Rejected, get_controller
+from .analysis import AnalyzerFailed, new_profile, record_cache_lookup, render_metrics, run_analyzer, server_timing
+from .analysis_cache import get_cached_result, store_result
 
 def homepage(request):
     #return HttpResponse("Hello World!")
@@ -10,24 +17,106 @@ def about(request):
     #return HttpResponse("My About Page.")
     return render(request, 'about.html')
 
+def rejected_response(rejection):
+    response = HttpResponse(rejection.reason, status=rejection.status, content_type='text/plain')
+    response['Retry-After'] = str(rejection.retry_after)
+    return response
+
+def analyze(request, user_input, profile):
+    """
+    Return (result, cache_status) for user_input. Raises Rejected if the
+    request is not admitted by the admission controller.
+    """
+    if profile:
+        with profile.measure('cache'):
+            result = get_cached_result(user_input)
+    else:
+        result = get_cached_result(user_input)
+    cache_status = 'HIT' if result is not None else 'MISS'
+    record_cache_lookup(cache_status)
+
+    if result is None:
+        controller = get_controller()
+        controller.acquire(request.META.get('REMOTE_ADDR'))
+        try:
+            result = run_analyzer(user_input, profile)
+            # Only results of successful runs are cached; a failure may be transient.
+            store_result(user_input, result)
+        except AnalyzerFailed as e:
+            result = e.output
+        except Exception as e:
+            result = f"An error occurred: {e}"
+        finally:
+            controller.release()
+
+    return result, cache_status
+
+def wants_debug_timings(request):
+    return settings.JARGEN_DEBUG_TIMINGS and request.GET.get('debug') == '1'
+
+def add_analysis_headers(response, cache_status, profile, started):
+    if cache_status:
+        response['X-Cache'] = cache_status
+    if profile:
+        response['Server-Timing'] = server_timing(profile, perf_counter() - started)
+    return response
+
 def lexical_analyzer(request):
+    started = perf_counter()
     result = None
     user_input = ''
+    cache_status = None
+    profile = None
     if request.method == 'POST':
         # Retrieve the content from the textarea field
         user_input = request.POST.get('user_input', '').strip() # 'user_input' matches the name attribute of the textarea
         if user_input:
+            profile = new_profile() if settings.JARGEN_SERVER_TIMING else None
             try:
-                # Run the Python script with the input as an argument
-                script_path = 'C:\\Users\\Abram\Documents\\1st Sem (3rd Year College)\\Principles of Programming Languages\\JARGEN\\JARGEN\\syntax.analyzer\\main.py'  # Replace with the actual path
-                process = subprocess.run(
-                    ['python', script_path, user_input],
-                    capture_output=True,
-                    text=True
-                )
-                # Capture the script's output
-                result = process.stdout.strip() if process.returncode == 0 else process.stderr.strip()
-            except Exception as e:
-                result = f"An error occurred: {e}"
-    
-    return render(request, 'syntax-analyzer.html', {'user_input': user_input, 'result': result})
+                result, cache_status = analyze(request, user_input, profile)
+            except Rejected as e:
+                return rejected_response(e)
+
+    context = {'user_input': user_input, 'result': result}
+    if profile and wants_debug_timings(request):
+        context['timings'] = profile.as_dict()
+    response = render(request, 'syntax-analyzer.html', context)
+    return add_analysis_headers(response, cache_status, profile, started)
+
+@csrf_exempt
+def analyze_api(request):
+    """
+    POST a JSON body {"source": "..."} (or a form with `user_input`) and get
+    {"result": "...", "cache": "HIT" | "MISS"} back.
+    """
+    started = perf_counter()
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required.'}, status=405)
+
+    if request.content_type == 'application/json':
+        try:
+            user_input = json.loads(request.body).get('source', '')
+        except (ValueError, AttributeError):
+            return JsonResponse({'error': 'Invalid JSON body.'}, status=400)
+    else:
+        user_input = request.POST.get('user_input', '')
+    if not isinstance(user_input, str) or not user_input.strip():
+        return JsonResponse({'error': 'No source code provided.'}, status=400)
+    user_input = user_input.strip()
+
+    profile = new_profile() if settings.JARGEN_SERVER_TIMING else None
+    try:
+        result, cache_status = analyze(request, user_input, profile)
+    except Rejected as e:
+        return rejected_response(e)
+
+    data = {'result': result, 'cache': cache_status}
+    if profile and wants_debug_timings(request):
+        data['timings'] = profile.as_dict()
+    response = JsonResponse(data)
+    return add_analysis_headers(response, cache_status, profile, started)
+
+def metrics(request):
+    if not settings.JARGEN_METRICS:
+        raise Http404("Metrics are disabled.")
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,282 @@
+"""
+Byte-level lexer for large JARGEN sources.
+
+tokenize_file() maps the file with mmap and scans the mapping as ASCII
+bytes, so the source is never decoded into one big str or split into a list
+of lines. The first byte of every token is classified with a 256-entry
+table, and each token is stored as (offset, length, kind) in compact typed
+arrays; its text is only decoded when it is asked for. Apart from the
+mapping itself, memory use is about 9 bytes per token plus 4 per line.
+
+The tokens are the same as interpreter.tokenize() produces for ASCII input,
+and `ByteTokens.lines` can be passed to validate_token_lines() or
+SyntaxAnalyzer like the list the regular lexer returns. Bytes outside ASCII
+are reported as invalid characters.
+
+    tokens = tokenize_file("big.jargen")
+    tokens.token(0)          # ('Keyword', 'flex')
+    SyntaxAnalyzer(tokens.lines, echo=False).parse_program()
+    tokens.close()
+"""
+import mmap
+import re
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+from interpreter import (
+    Bracket_Names, Brackets, Delimiter_Names, Delimiters, Keywords, LexError,
+    Operator_Names, Operator_Symbols, Reserved_Words, validate_token_lines,
+)
+
+# ----------------------------------------------------------------
+# Token kinds: index into TOKEN_TYPES, stored in one byte per token
+# ----------------------------------------------------------------
+TOKEN_TYPES = ["Integer", "Float Number", "Keyword", "Reserved Word", "Function", "Identifier", "String"]
+TOKEN_TYPES += Operator_Names + Bracket_Names + Delimiter_Names
+KIND = {name: kind for kind, name in enumerate(TOKEN_TYPES)}
+
+WORD_KINDS = {word.encode("ascii"): KIND["Keyword"] for word in Keywords}
+WORD_KINDS.update({word.encode("ascii"): KIND["Reserved Word"] for word in Reserved_Words})
+
+OPERATOR_KINDS = {symbol.encode("ascii"): KIND[name] for symbol, name in zip(Operator_Symbols, Operator_Names)}
+PUNCTUATION_KINDS = {ord(symbol): KIND[name] for symbol, name in zip(Brackets, Bracket_Names)}
+PUNCTUATION_KINDS.update({ord(symbol): KIND[name] for symbol, name in zip(Delimiters, Delimiter_Names)})
+
+# ----------------------------------------------------------------
+# Byte classes
+# ----------------------------------------------------------------
+INVALID, SPACE, NEWLINE, DIGIT, DOT, ALPHA, QUOTE, OPERATOR, PUNCTUATION = range(9)
+
+BYTE_CLASS = bytearray([INVALID]) * 256
+for byte in b" \t\r\x0b\x0c\x1c\x1d\x1e\x1f":  # what str.isspace() accepts in ASCII
+    BYTE_CLASS[byte] = SPACE
+BYTE_CLASS[ord("\n")] = NEWLINE
+for byte in b"0123456789":
+    BYTE_CLASS[byte] = DIGIT
+BYTE_CLASS[ord(".")] = DOT
+for byte in b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ":
+    BYTE_CLASS[byte] = ALPHA
+for byte in b"\"'":
+    BYTE_CLASS[byte] = QUOTE
+for byte in b"=+-*/%^><!&|":
+    BYTE_CLASS[byte] = OPERATOR
+for byte in PUNCTUATION_KINDS:
+    BYTE_CLASS[byte] = PUNCTUATION
+BYTE_CLASS = bytes(BYTE_CLASS)
+
+# Runs are matched directly against the mapping (re accepts any buffer).
+WORD_RUN = re.compile(rb"[A-Za-z0-9]+")
+NUMBER_RUN = re.compile(rb"[0-9.]+")
+BLANK = re.compile(rb"[ \t\r\n\x0b\x0c\x1c-\x1f]*\Z")
+
+# Number of decoded lines kept by TokenLines; validate_token_lines() reads
+# the tokens of nearby lines repeatedly while it looks for closing braces.
+LINE_CACHE_SIZE = 64
+
+
+class ByteTokens:
+    """
+    Tokens of one source buffer.
+      - offsets, lengths : where each token's text is in `buffer`
+      - kinds            : index of each token's type in TOKEN_TYPES
+      - line_starts      : index of the first token of each line, plus a
+                           final entry equal to the number of tokens
+    """
+    def __init__(self, buffer, closer=None):
+        self.buffer = buffer
+        self.offsets = array("I")
+        self.lengths = array("I")
+        self.kinds = array("B")
+        self.line_starts = array("I")
+        self._closer = closer
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def line_count(self):
+        return len(self.line_starts) - 1
+
+    def value(self, i):
+        start = self.offsets[i]
+        return str(self.buffer[start:start + self.lengths[i]], "ascii")
+
+    def token(self, i):
+        return (TOKEN_TYPES[self.kinds[i]], self.value(i))
+
+    def line_of(self, i):
+        """
+        1-based line number of token `i`.
+        """
+        return bisect_right(self.line_starts, i)
+
+    @property
+    def lines(self):
+        return TokenLines(self)
+
+    def close(self):
+        if self._closer is not None:
+            self._closer()
+            self._closer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TokenLines:
+    """
+    Read-only list-of-lines view over ByteTokens, in the shape returned by
+    interpreter.tokenize(). Lines are decoded when they are indexed.
+    """
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.cache = OrderedDict()
+
+    def __len__(self):
+        return self.tokens.line_count
+
+    def __getitem__(self, n):
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError("line index out of range")
+        line = self.cache.get(n)
+        if line is None:
+            starts = self.tokens.line_starts
+            line = [self.tokens.token(i) for i in range(starts[n], starts[n + 1])]
+            self.cache[n] = line
+            if len(self.cache) > LINE_CACHE_SIZE:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(n)
+        return line
+
+    def __iter__(self):
+        for n in range(len(self)):
+            yield self[n]
+
+
+def scan(buffer, tokens):
+    """
+    Fill `tokens` with the tokens of `buffer`. Raises LexError with the
+    same messages as interpreter.tokenize_line().
+    """
+    offsets = tokens.offsets
+    lengths = tokens.lengths
+    kinds = tokens.kinds
+    line_starts = tokens.line_starts
+    size = len(buffer)
+
+    line_no = 1
+    line_start = 0
+    line_starts.append(0)
+    i = 0
+    while i < size:
+        byte = buffer[i]
+        byte_class = BYTE_CLASS[byte]
+
+        if byte_class == SPACE:
+            i += 1
+            continue
+
+        if byte_class == NEWLINE:
+            i += 1
+            line_no += 1
+            line_start = i
+            line_starts.append(len(kinds))
+            continue
+
+        start = i
+        if byte_class == DIGIT or (byte_class == DOT and i + 1 < size and BYTE_CLASS[buffer[i + 1]] == DIGIT):
+            end = NUMBER_RUN.match(buffer, i).end()
+            dot = buffer.find(b".", i, end)
+            if dot != -1:
+                second = buffer.find(b".", dot + 1, end)
+                if second != -1:
+                    column = second - line_start + 1
+                    raise LexError(f"Error: Invalid number format at line {line_no}, position {column}.",
+                                   line_no, column, column + 1)
+                kind = KIND["Float Number"]
+            else:
+                kind = KIND["Integer"]
+            i = end
+
+        elif byte_class == ALPHA:
+            i = WORD_RUN.match(buffer, i).end()
+            kind = WORD_KINDS.get(buffer[start:i])
+            if kind is None:
+                kind = KIND["Function"] if i < size and buffer[i] == 0x28 else KIND["Identifier"]
+
+        elif byte_class == QUOTE:
+            close = buffer.find(bytes((byte,)), i + 1)
+            newline = buffer.find(b"\n", i + 1)
+            if close == -1 or (newline != -1 and newline < close):
+                line_end = size if newline == -1 else newline
+                raise LexError(f"Error: Unclosed string literal starting at line {line_no}, position {start - line_start + 1}.",
+                               line_no, start - line_start + 1, line_end - line_start + 1)
+            i = close + 1
+            kind = KIND["String"]
+
+        elif byte_class == OPERATOR:
+            kind = OPERATOR_KINDS.get(buffer[i:i + 2]) if i + 1 < size else None
+            if kind is not None:
+                i += 2
+            else:
+                kind = OPERATOR_KINDS.get(buffer[i:i + 1])
+                if kind is None:
+                    column = i - line_start + 1
+                    raise LexError(f"Error: Invalid character '{chr(byte)}' at line {line_no}, position {column}.",
+                                   line_no, column, column + 1)
+                i += 1
+
+        elif byte_class == PUNCTUATION:
+            kind = PUNCTUATION_KINDS[byte]
+            i += 1
+
+        else:
+            char = chr(byte) if byte < 0x80 else f"\\x{byte:02x}"
+            column = i - line_start + 1
+            raise LexError(f"Error: Invalid character '{char}' at line {line_no}, position {column}.",
+                           line_no, column, column + 1)
+
+        offsets.append(start)
+        lengths.append(i - start)
+        kinds.append(kind)
+
+    line_starts.append(len(kinds))
+    return tokens
+
+
+def tokenize_buffer(buffer, validate=True, closer=None):
+    """
+    Tokenize a bytes or mmap object. With `validate`, the
+    statement-level checks of validate_token_lines() run afterwards.
+    """
+    if BLANK.match(buffer):
+        raise LexError("Error: Input content is empty.")
+    tokens = scan(buffer, ByteTokens(buffer, closer))
+    if validate:
+        validate_token_lines(tokens.lines, tokens.line_count)
+    return tokens
+
+
+def tokenize_file(path, validate=True):
+    """
+    Tokenize the file at `path` through a read-only memory mapping. Close
+    the returned ByteTokens (or use it as a context manager) to unmap it.
+    """
+    with open(path, "rb") as f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap refuses empty files
+            raise LexError("Error: Input content is empty.")
+    try:
+        return tokenize_buffer(mapping, validate, closer=mapping.close)
+    except BaseException:
+        mapping.close()
+        raise
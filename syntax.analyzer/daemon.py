@@ -0,0 +1,127 @@
+"""
+Long-lived analysis daemon.
+
+Loads the front end once and answers requests on a Unix domain socket
+using the length-prefixed JSON protocol from protocol.py. Each connection
+is served by its own thread and may send any number of requests:
+
+    {"op": "lex" | "parse" | "analyze" | "render" | "ping", "source": "..."}
+
+Responses always carry "ok"; see handle_request() for the other fields.
+Start it with `python jargen.py daemon` (or `python daemon.py`) and talk to
+it with jargenc.py.
+"""
+import os
+import socket
+import socketserver
+import sys
+
+from frontend import analyze_source, tree_to_dict
+from interpreter import tokenize
+from protocol import default_socket_path, recv_message, send_message
+
+OPERATIONS = {"lex", "parse", "analyze", "render", "ping"}
+
+
+def handle_request(request):
+    """
+    Run one request and return the response dict.
+      - lex     : {"ok", "tokens": [[[type, value], ...] per line]} or errors
+      - parse   : {"ok", "tree": nested dict or None, "category", "errors", "spans"}
+      - analyze : {"ok", "tokens": count, "category", "errors", "spans"}
+    A span is [line, column, end_line, end_column] or None.
+      - render  : {"ok", "output": text printed by main.py}
+    """
+    if not isinstance(request, dict) or request.get("op") not in OPERATIONS:
+        return {"ok": False, "category": "request",
+                "errors": [f"Unknown operation. Expected one of {sorted(OPERATIONS)}."]}
+
+    op = request["op"]
+    if op == "ping":
+        return {"ok": True, "pid": os.getpid()}
+
+    source = request.get("source")
+    if not isinstance(source, str):
+        return {"ok": False, "category": "request", "errors": ["Missing 'source' string."]}
+
+    if op == "lex":
+        try:
+            token_lines = tokenize(source)
+        except ValueError as e:
+            return {"ok": False, "category": "lexical", "errors": [str(e)], "spans": [getattr(e, "span", None)]}
+        return {"ok": True, "tokens": [[list(token) for token in line] for line in token_lines]}
+
+    result = analyze_source(source)
+    if op == "parse":
+        return {"ok": result.ok, "tree": tree_to_dict(result.tree),
+                "category": result.error_category, "errors": result.errors, "spans": result.spans}
+    if op == "analyze":
+        return {"ok": result.ok, "tokens": result.token_count,
+                "category": result.error_category, "errors": result.errors, "spans": result.spans}
+    return {"ok": result.ok, "output": result.output}
+
+
+class RequestHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (ValueError, UnicodeDecodeError) as e:
+                send_message(self.request, {"ok": False, "category": "request", "errors": [str(e)]})
+                return
+            except OSError:
+                return
+            if request is None:
+                return
+            try:
+                response = handle_request(request)
+            except Exception as e:
+                response = {"ok": False, "category": "internal", "errors": [f"{type(e).__name__}: {e}"]}
+            try:
+                send_message(self.request, response)
+            except OSError:
+                return
+
+
+class AnalysisServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def remove_stale_socket(path):
+    """
+    Delete a socket file left behind by a daemon that is no longer running.
+    Raises RuntimeError if a daemon is still listening on it.
+    """
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise RuntimeError(f"A JARGEN daemon is already listening on {path}.")
+    finally:
+        probe.close()
+
+
+def serve(path=None):
+    path = path or default_socket_path()
+    remove_stale_socket(path)
+    server = AnalysisServer(path, RequestHandler)
+    os.chmod(path, 0o600)
+    sys.stderr.write(f"JARGEN daemon listening on {path}\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(serve(sys.argv[1] if len(sys.argv) > 1 else None))
@@ -0,0 +1,663 @@
+"""
+Tree-walking evaluator for SyntaxAnalyzer parse trees.
+
+Evaluator.run() executes a PROGRAM tree. Variables live in frames of slots
+laid out by resolve.py: every scope that is entered gets a Frame, and an
+IDENTIFIER is read through its (depth, slot) binding. Values follow the
+JavaScript the language borrows from: one number type (kept as a Python
+int while it is whole), `+` concatenates when either side is a string,
+`/` by zero gives Infinity or NaN, `&&` / `||` return an operand, and
+`tru` / `barbers` / `undefined` print as such.
+
+Counting loops in the canonical shape the lexer enforces,
+
+    forreal (i = a; i < b; i++) { ... }
+
+run as a native integer range when the body never assigns `i` or the bound
+(calling a `trend` counts as assigning every variable functions assign)
+and `a` and `b` are integers when the loop starts. The condition and the
+increment are then never evaluated; `i` is stored into its slot once per
+iteration and holds the same value afterwards as with the general loop.
+Any other loop, or a canonical one whose bounds turn out not to be
+integers, takes the general path.
+
+A `mood` with `scene` cases jumps straight to the matching case through
+the SwitchTable built by switch_lowering.py (once per statement); cases do
+not fall through.
+
+Calls of the functions purity.py finds pure (and not annotated `@nomemo`)
+are memoized: each definition of such a trend gets a MemoTable, a bounded
+LRU map from argument values to replies. Calls whose arguments are not all
+numbers, strings or undefined are not looked up or stored.
+"""
+import math
+from collections import OrderedDict
+
+from licm import assigned_names, function_writes
+from purity import analyze_purity
+from resolve import resolve_tree
+from switch_lowering import lower_switch
+
+INF = float("inf")
+NAN = float("nan")
+
+TRUE = "tru"
+FALSE = "barbers"
+
+# Loop conditions a counting loop can have, with the direction they need.
+RANGE_CONDITIONS = {("++", "<"), ("++", "<="), ("++", "!="), ("--", ">"), ("--", ">="), ("--", "!=")}
+
+
+class EvaluationError(RuntimeError):
+    pass
+
+
+class Frame:
+    __slots__ = ("values", "parent")
+
+    def __init__(self, size, parent=None):
+        self.values = [None] * size
+        self.parent = parent
+
+
+class Reply:
+    """
+    Result of a statement that ran `reply`; unwinds to the call.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+# ----------------------------------------------------------------
+# Values
+# ----------------------------------------------------------------
+def to_number(value):
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return 0
+        try:
+            return int(text)
+        except ValueError:
+            try:
+                return float(text)
+            except ValueError:
+                return NAN
+    return NAN
+
+
+def to_text(value):
+    if value is None:
+        return "undefined"
+    if value is True:
+        return TRUE
+    if value is False:
+        return FALSE
+    if isinstance(value, float):
+        if value != value:
+            return "NaN"
+        if value in (INF, -INF):
+            return "Infinity" if value > 0 else "-Infinity"
+        if value.is_integer() and abs(value) < 1e21:
+            return str(int(value))
+        return repr(value)
+    if isinstance(value, list):
+        return ",".join("" if item is None else to_text(item) for item in value)
+    return str(value)
+
+
+def truthy(value):
+    if isinstance(value, float):
+        return value == value and value != 0
+    if isinstance(value, list):
+        return True
+    return bool(value)
+
+
+def add(a, b):
+    if isinstance(a, (str, list)) or isinstance(b, (str, list)):
+        return to_text(a) + to_text(b)
+    return to_number(a) + to_number(b)
+
+
+def subtract(a, b):
+    return to_number(a) - to_number(b)
+
+
+def multiply(a, b):
+    return to_number(a) * to_number(b)
+
+
+def divide(a, b):
+    a, b = to_number(a), to_number(b)
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.copysign(INF, a) * math.copysign(1.0, b)
+    if isinstance(a, int) and isinstance(b, int) and a % b == 0:
+        return a // b
+    return a / b
+
+
+def remainder(a, b):
+    a, b = to_number(a), to_number(b)
+    if b == 0:
+        return NAN
+    if isinstance(a, int) and isinstance(b, int):
+        result = abs(a) % abs(b)
+        return -result if a < 0 else result
+    return math.fmod(a, b)
+
+
+def power(a, b):
+    a, b = to_number(a), to_number(b)
+    try:
+        if isinstance(b, int) and b < 0:
+            return float(a) ** b
+        result = a ** b
+    except ZeroDivisionError:
+        return INF
+    except OverflowError:
+        return INF
+    return NAN if isinstance(result, complex) else result
+
+
+def equals(a, b):
+    if isinstance(a, str) and isinstance(b, str):
+        return a == b
+    if a is None or b is None or isinstance(a, list) or isinstance(b, list):
+        return a is b
+    return to_number(a) == to_number(b)
+
+
+def compare(op, a, b):
+    if not (isinstance(a, str) and isinstance(b, str)):
+        a, b = to_number(a), to_number(b)
+    if op == "<":
+        return a < b
+    if op == ">":
+        return a > b
+    if op == "<=":
+        return a <= b
+    return a >= b
+
+
+ARITHMETIC = {
+    "+": add,
+    "-": subtract,
+    "*": multiply,
+    "/": divide,
+    "%": remainder,
+    "^": power,
+}
+
+
+# ----------------------------------------------------------------
+# Counting loops
+# ----------------------------------------------------------------
+class RangePlan:
+    def __init__(self, counter, start, bound, op, step):
+        self.counter = counter  # IDENTIFIER of the loop variable
+        self.start = start
+        self.bound = bound
+        self.op = op
+        self.step = step
+
+
+def same_variable(a, b):
+    return a.node_type == b.node_type == "IDENTIFIER" and getattr(a, "variable", None) is getattr(b, "variable", 0)
+
+
+def range_plan(loop, called_writes):
+    """
+    RangePlan of a canonical counting FOR_STMT, or None.
+    """
+    init, condition, update, body = loop.children
+    if init.node_type != "BINARY_OP" or init.value != "=" or condition.node_type != "BINARY_OP" \
+            or update.node_type != "POSTFIX_OP":
+        return None
+    counter, start = init.children
+    if counter.node_type != "IDENTIFIER" or getattr(counter, "binding", None) is None:
+        return None
+    if (update.value, condition.value) not in RANGE_CONDITIONS:
+        return None
+    if not same_variable(counter, condition.children[0]) or not same_variable(counter, update.children[0]):
+        return None
+
+    bound = condition.children[1]
+    for operand in (start, bound):
+        if operand.node_type == "IDENTIFIER":
+            if getattr(operand, "binding", None) is None or same_variable(operand, counter):
+                return None
+        elif operand.node_type != "INTEGER":
+            return None
+
+    assigned, calls = assigned_names(body)
+    if calls:
+        assigned |= called_writes
+    if counter.value in assigned or (bound.node_type == "IDENTIFIER" and bound.value in assigned):
+        return None
+    return RangePlan(counter, start, bound, condition.value, 1 if update.value == "++" else -1)
+
+
+def range_stop(plan, start, bound):
+    """
+    Stop of the Python range the loop runs, or None if the general loop
+    would not end the same way.
+    """
+    if plan.op == "!=":
+        if (bound - start) * plan.step < 0:
+            return None
+        return bound
+    if plan.op == "<=":
+        return bound + 1
+    if plan.op == ">=":
+        return bound - 1
+    return bound
+
+
+# ----------------------------------------------------------------
+# Memoization
+# ----------------------------------------------------------------
+# Default number of replies a MemoTable keeps.
+MEMO_SIZE = 1024
+
+MISSING = object()
+
+
+def memo_key(args):
+    """
+    Key of the argument values `args` in a MemoTable, or None if they
+    cannot be one. Booleans (equal to 0 and 1 in Python), arrays, NaN and
+    zero floats (-0 is not 0 to `/`) are left out.
+    """
+    for arg in args:
+        kind = type(arg)
+        if kind is float:
+            if arg != arg or arg == 0:
+                return None
+        elif kind is not int and kind is not str and arg is not None:
+            return None
+    return tuple(args)
+
+
+class MemoTable:
+    """
+    Replies of one pure trend by argument values, least recently used
+    first; holds at most `size` of them.
+    """
+    __slots__ = ("size", "entries", "hits", "misses", "evictions")
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        value = self.entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if len(self.entries) >= self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        self.entries[key] = value
+
+
+# ----------------------------------------------------------------
+# Evaluator
+# ----------------------------------------------------------------
+class Evaluator:
+    """
+    Runs a PROGRAM tree. `write` receives each line `spill` prints and
+    `read` is called (with no arguments) for each `post`. Pure functions
+    keep up to `memo_size` replies each; 0 turns memoization off.
+    """
+    def __init__(self, write=print, read=input, memo_size=MEMO_SIZE):
+        self.write = write
+        self.read = read
+        self.memo_size = memo_size
+        # name -> (FUNCTION_DEF, Frame it was defined in, MemoTable or None)
+        self.functions = {}
+        self.called_writes = set()
+        self.memoizable = set()
+        self.memo_tables = []  # (name, MemoTable) per memoized definition
+        self.stats = {"range_loops": 0, "general_loops": 0, "calls": 0}
+        self.statements = {
+            "STATEMENT_LIST": self.block,
+            "BLOCK": self.run_block,
+            "DECLARATION": self.run_declaration,
+            "EXPR_STMT": self.run_expr_stmt,
+            "IF_CHAIN": self.run_if_chain,
+            "FOR_STMT": self.run_for,
+            "WHILE_STMT": self.run_while,
+            "PRINT_STMT": self.run_print,
+            "INPUT_STMT": self.run_input,
+            "SWITCH_STMT": self.run_switch,
+            "FUNCTION_DEF": self.run_function_def,
+            "FUNCTION_STMT": self.run_function_stmt,
+            "RETURN_STMT": self.run_return,
+            "LINE_STMT": self.run_nothing,
+        }
+        self.expressions = {
+            "INTEGER": self.constant,
+            "FLOAT_NUMBER": self.constant,
+            "STRING": self.constant,
+            "BOOLEAN": self.constant,
+            "IDENTIFIER": self.read_variable,
+            "BINARY_OP": self.binary_op,
+            "POSTFIX_OP": self.postfix_op,
+            "ARRAY_LITERAL": self.array_literal,
+            "FUNCTION_CALL": self.call,
+        }
+
+    def run(self, tree, symbols=None):
+        resolution = resolve_tree(tree, symbols)
+        if not resolution.ok:
+            raise EvaluationError(resolution.errors[0])
+        prepare(tree)
+        self.called_writes = function_writes(tree)
+        if self.memo_size > 0:
+            self.memoizable = analyze_purity(tree).memoizable
+
+        frame = Frame(len(tree.scope))
+        statements = tree.children[0]
+        for stmt in statements.children:
+            if stmt.node_type == "FUNCTION_DEF":
+                self.define(stmt, frame)
+        try:
+            self.exec_statements(statements, frame)
+        except RecursionError:
+            raise EvaluationError("Maximum call depth exceeded.") from None
+        return frame
+
+    # -- variables -------------------------------------------------
+    def slot_of(self, node, frame):
+        binding = getattr(node, "binding", None)
+        if binding is None:
+            raise EvaluationError(f"'{node.value}' is not defined.")
+        depth, slot = binding
+        while depth:
+            frame = frame.parent
+            depth -= 1
+        return frame.values, slot
+
+    def read_variable(self, node, frame):
+        values, slot = self.slot_of(node, frame)
+        return values[slot]
+
+    def assign(self, target, op, value, frame):
+        values, slot = self.slot_of(target, frame)
+        if op != "=":
+            value = ARITHMETIC[op[:-1]](values[slot], value)
+        values[slot] = value
+        return value
+
+    def increment(self, target, op, frame):
+        values, slot = self.slot_of(target, frame)
+        old = to_number(values[slot])
+        values[slot] = old + 1 if op == "++" else old - 1
+        return old
+
+    # -- expressions -----------------------------------------------
+    def evaluate(self, node, frame):
+        handler = self.expressions.get(node.node_type)
+        if handler is None:
+            raise EvaluationError(f"Cannot evaluate {node.node_type}.")
+        return handler(node, frame)
+
+    def constant(self, node, frame):
+        return node.constant
+
+    def binary_op(self, node, frame):
+        op = node.value
+        left, right = node.children
+        if op.endswith("=") and op not in ("==", "!=", "<=", ">="):
+            return self.assign(left, op, self.evaluate(right, frame), frame)
+        a = self.evaluate(left, frame)
+        if op == "&&":
+            return self.evaluate(right, frame) if truthy(a) else a
+        if op == "||":
+            return a if truthy(a) else self.evaluate(right, frame)
+        b = self.evaluate(right, frame)
+        function = ARITHMETIC.get(op)
+        if function is not None:
+            return function(a, b)
+        if op == "==":
+            return equals(a, b)
+        if op == "!=":
+            return not equals(a, b)
+        return compare(op, a, b)
+
+    def postfix_op(self, node, frame):
+        return self.increment(node.children[0], node.value, frame)
+
+    def array_literal(self, node, frame):
+        return [self.evaluate(child, frame) for child in node.children]
+
+    def call(self, node, frame):
+        entry = self.functions.get(node.value)
+        if entry is None:
+            raise EvaluationError(f"trend '{node.value}' is not defined.")
+        definition, closure, memo = entry
+        args = [self.evaluate(arg, frame) for arg in node.children]
+        key = None
+        if memo is not None:
+            key = memo_key(args)
+            if key is not None:
+                value = memo.get(key)
+                if value is not MISSING:
+                    return value
+        self.stats["calls"] += 1
+
+        callee = Frame(len(definition.scope), closure)
+        params = len(definition.children[0].children)
+        callee.values[:params] = (args + [None] * params)[:params]
+        result = self.exec_statements(definition.children[1].children[0], callee)
+        value = result.value if result is not None else None
+        if key is not None:
+            memo.put(key, value)
+        return value
+
+    def memo_stats(self):
+        """
+        name -> entries, hits, misses and evictions of its MemoTables.
+        """
+        stats = {}
+        for name, memo in self.memo_tables:
+            totals = stats.setdefault(name, {"entries": 0, "hits": 0, "misses": 0, "evictions": 0})
+            totals["entries"] += len(memo.entries)
+            totals["hits"] += memo.hits
+            totals["misses"] += memo.misses
+            totals["evictions"] += memo.evictions
+        return stats
+
+    # -- statements ------------------------------------------------
+    def execute(self, node, frame):
+        handler = self.statements.get(node.node_type)
+        if handler is None:
+            raise EvaluationError(f"Cannot execute {node.node_type}.")
+        return handler(node, frame)
+
+    def exec_statements(self, stmt_list, frame):
+        statements = self.statements
+        for stmt in stmt_list.children:
+            result = statements[stmt.node_type](stmt, frame)
+            if result is not None:
+                return result
+        return None
+
+    def block(self, stmt_list, frame):
+        scope = getattr(stmt_list, "scope", None)
+        if scope is not None:
+            frame = Frame(len(scope), frame)
+        return self.exec_statements(stmt_list, frame)
+
+    def run_block(self, node, frame):
+        return self.exec_statements(node.children[0], Frame(len(node.scope), frame))
+
+    def run_nothing(self, node, frame):
+        return None
+
+    def run_declaration(self, node, frame):
+        if len(node.children) > 1:
+            assign = node.children[1]
+            self.assign(assign.children[0], assign.value, self.evaluate(assign.children[1], frame), frame)
+        return None
+
+    def run_expr_stmt(self, node, frame):
+        expr = node.children[0]
+        if expr.node_type == "ASSIGNMENT_OP":
+            self.assign(expr.children[0], expr.value, self.evaluate(expr.children[1], frame), frame)
+        elif expr.node_type == "INCDEC_OP":
+            self.increment(expr.children[0], expr.value, frame)
+        else:
+            self.evaluate(expr.children[0], frame)
+        return None
+
+    def run_if_chain(self, node, frame):
+        for branch in node.children:
+            if branch.node_type == "ELSE_BLOCK":
+                return self.block(branch.children[-1], frame)
+            if truthy(self.evaluate(branch.children[0], frame)):
+                return self.block(branch.children[1], frame)
+        return None
+
+    def run_for(self, node, frame):
+        plan = getattr(node, "range_plan", False)
+        if plan is False:
+            plan = node.range_plan = range_plan(node, self.called_writes)
+        if plan is None:
+            self.evaluate(node.children[0], frame)
+            return self.loop(node, frame)
+
+        start = self.evaluate(plan.start, frame)
+        values, slot = self.slot_of(plan.counter, frame)
+        values[slot] = start
+        bound = self.evaluate(plan.bound, frame)
+        stop = None
+        if type(start) is int and type(bound) is int:
+            stop = range_stop(plan, start, bound)
+        if stop is None:
+            return self.loop(node, frame)
+
+        self.stats["range_loops"] += 1
+        body = node.children[3]
+        size = len(body.scope)
+        # A body that declares nothing can share one empty frame.
+        shared = Frame(0, frame) if size == 0 else None
+        exec_statements = self.exec_statements
+        for value in range(start, stop, plan.step):
+            values[slot] = value
+            result = exec_statements(body, shared or Frame(size, frame))
+            if result is not None:
+                return result
+        if (stop - start) * plan.step > 0:
+            values[slot] = stop
+        return None
+
+    def loop(self, node, frame):
+        """
+        General forreal loop, after its first clause has run.
+        """
+        self.stats["general_loops"] += 1
+        _, condition, update, body = node.children
+        while truthy(self.evaluate(condition, frame)):
+            result = self.block(body, frame)
+            if result is not None:
+                return result
+            self.evaluate(update, frame)
+        return None
+
+    def run_while(self, node, frame):
+        self.stats["general_loops"] += 1
+        condition, body = node.children
+        while truthy(self.evaluate(condition, frame)):
+            result = self.block(body, frame)
+            if result is not None:
+                return result
+        return None
+
+    def run_print(self, node, frame):
+        self.write(to_text(self.evaluate(node.children[0], frame)))
+        return None
+
+    def run_input(self, node, frame):
+        try:
+            line = self.read()
+        except EOFError:
+            raise EvaluationError("post: no more input.") from None
+        self.assign(node.children[0], "=", line, frame)
+        return None
+
+    def run_switch(self, node, frame):
+        subject = self.evaluate(node.children[0], frame)
+        table = getattr(node, "switch_table", False)
+        if table is False:
+            table = node.switch_table = lower_switch(node)
+        if table is None:
+            # A mood body without scene cases is a plain block.
+            return self.block(node.children[1], frame)
+        body = table.lookup(subject)
+        return self.block(body, frame) if body is not None else None
+
+    def define(self, node, frame):
+        entry = self.functions.get(node.value)
+        if entry is not None and entry[0] is node and entry[1] is frame:
+            return
+        memo = None
+        if node.value in self.memoizable:
+            memo = MemoTable(self.memo_size)
+            self.memo_tables.append((node.value, memo))
+        self.functions[node.value] = (node, frame, memo)
+
+    def run_function_def(self, node, frame):
+        self.define(node, frame)
+        return None
+
+    def run_function_stmt(self, node, frame):
+        self.call(node.children[0], frame)
+        return None
+
+    def run_return(self, node, frame):
+        return Reply(self.evaluate(node.children[0], frame))
+
+
+def prepare(tree):
+    """
+    Store the Python value of every literal as `constant`.
+    """
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        node_type = node.node_type
+        if node_type == "INTEGER":
+            node.constant = int(node.value)
+        elif node_type == "FLOAT_NUMBER":
+            node.constant = float(node.value)
+        elif node_type == "STRING":
+            node.constant = node.value[1:-1]
+        elif node_type == "BOOLEAN":
+            node.constant = node.value == TRUE
+        stack.extend(node.children)
+
+
+def run_tree(tree, write=print, read=input, memo_size=MEMO_SIZE, symbols=None):
+    """
+    Execute the PROGRAM `tree` and return the Evaluator that ran it.
+    `symbols` is the SymbolTable the tree was interned with, if any.
+    """
+    evaluator = Evaluator(write, read, memo_size)
+    evaluator.run(tree, symbols)
+    return evaluator
@@ -0,0 +1,323 @@
+"""
+In-process entry point to the JARGEN front end (lexer + syntax analyzer).
+
+analyze_source() runs the same steps as `python main.py "<code>"`, but
+collects diagnostics in an AnalysisResult instead of printing them, so it is
+safe to call from several threads at once (e.g. from the Django view).
+analyze_many() does the same for a batch of programs.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import interpreter
+import metrics
+from inline import copy_tree
+from syntax_analyzer import SyntaxAnalyzer, intern_names
+
+# Programs per task when analyze_many() spreads a batch over processes.
+BATCH_CHUNK_SIZE = 256
+
+# Distinct source lines remembered by analyze_many() before the cache is
+# dropped; graded submissions share most of their lines.
+LINE_CACHE_SIZE = 1 << 16
+
+
+class AnalysisResult:
+    """
+    Outcome of analyze_source().
+      - token_lines : lexer output (list of lines of (type, value) tuples)
+      - tree        : the PROGRAM ParseTreeNode, or None if analysis failed
+      - positions   : interpreter.TokenPositions of the tokens
+      - symbols     : interpreter.SymbolTable of the names in the program;
+                      named tree nodes carry their id as `symbol`
+      - lex_error   : the lexer's error message, if any
+      - lex_error_span : its (line, column, end_line, end_column), if known
+      - syntax_errors : list of syntax error messages
+      - syntax_error_spans : span of each syntax error
+      - internal_error : "<ExceptionType>: <message>" if the front end
+                      itself failed on this program (analyze_many() only)
+      - output      : the text main.py would print for this source
+                      (rendered on first access)
+    """
+    def __init__(self, source):
+        self.source = source
+        self.token_lines = []
+        self.tree = None
+        self.positions = interpreter.TokenPositions()
+        self.symbols = interpreter.SymbolTable()
+        self.lex_error = None
+        self.lex_error_span = None
+        self.syntax_errors = []
+        self.syntax_error_spans = []
+        self.internal_error = None
+        self._output = None
+
+    def copy(self):
+        """
+        An independent copy of this result. Tokens (tuples of strings) are
+        immutable and shared; every list, table and tree node is copied.
+        """
+        other = AnalysisResult(self.source)
+        other.token_lines = [list(tokens) for tokens in self.token_lines]
+        other.tree = copy_tree(self.tree) if self.tree is not None else None
+        other.positions.starts = self.positions.starts[:]
+        other.positions.line_starts = self.positions.line_starts[:]
+        other.symbols.ids = dict(self.symbols.ids)
+        other.symbols.names = list(self.symbols.names)
+        other.lex_error = self.lex_error
+        other.lex_error_span = self.lex_error_span
+        other.syntax_errors = list(self.syntax_errors)
+        other.syntax_error_spans = list(self.syntax_error_spans)
+        other.internal_error = self.internal_error
+        other._output = self._output
+        return other
+
+    @property
+    def output(self):
+        if self._output is None:
+            self._output = render_output(self)
+        return self._output
+
+    @property
+    def token_count(self):
+        return sum(len(line) for line in self.token_lines)
+
+    @property
+    def error_category(self):
+        if self.internal_error is not None:
+            return "internal"
+        if self.lex_error is not None:
+            return "lexical"
+        if self.syntax_errors:
+            return "syntax"
+        return None
+
+    @property
+    def errors(self):
+        if self.internal_error is not None:
+            return [self.internal_error]
+        if self.lex_error is not None:
+            return [self.lex_error]
+        return list(self.syntax_errors)
+
+    @property
+    def spans(self):
+        """
+        Span of each entry of `errors` (None where unknown).
+        """
+        if self.internal_error is not None:
+            return [None]
+        if self.lex_error is not None:
+            return [self.lex_error_span]
+        return list(self.syntax_error_spans)
+
+    @property
+    def ok(self):
+        return self.error_category is None
+
+
+def format_parse_tree(node, indent=0, lines=None):
+    """
+    Return the parse tree as the indented text printed by main.py.
+    """
+    if lines is None:
+        lines = []
+    if not node:
+        return lines
+    prefix = "  " * indent
+
+    if node.value:
+        lines.append(f"{prefix}{node.node_type}({node.value})")
+    else:
+        lines.append(f"{prefix}{node.node_type}")
+    for child in node.children:
+        format_parse_tree(child, indent + 1, lines)
+    return lines
+
+
+def tree_to_dict(node):
+    """
+    Convert a ParseTreeNode into nested dicts (for JSON output).
+    """
+    if node is None:
+        return None
+    return {
+        "type": node.node_type,
+        "value": node.value,
+        "children": [tree_to_dict(child) for child in node.children],
+    }
+
+
+def parse_tokens(result, analyzer):
+    if result.lex_error is None and result.token_lines:
+        analyzer.reset(result.token_lines, result.positions)
+        tree = analyzer.parse_program()
+        result.syntax_errors = analyzer.errors
+        result.syntax_error_spans = analyzer.error_spans
+        if analyzer.error_count == 0:
+            intern_names(tree, result.symbols)
+            result.tree = tree
+
+
+def record_metrics(result):
+    metrics.SOURCE_BYTES.observe(len(result.source.encode("utf-8")))
+    metrics.TOKEN_COUNT.observe(result.token_count)
+    if result.error_category:
+        metrics.ERRORS.inc(result.error_category)
+
+
+def analyze_source(source):
+    result = AnalysisResult(source)
+
+    try:
+        result.token_lines = interpreter.tokenize(source, result.positions, result.symbols)
+    except ValueError as e:
+        result.lex_error = str(e)
+        result.lex_error_span = getattr(e, "span", None)
+
+    parse_tokens(result, SyntaxAnalyzer([], echo=False))
+
+    timer = interpreter.phase_timer
+    started = timer.start("render") if timer else None
+    result.output  # rendered here so that it is timed as its own phase
+    if timer:
+        timer.stop("render", started)
+
+    if metrics.ENABLED:
+        record_metrics(result)
+
+    return result
+
+
+# ----------------------------------------------------------------
+# Batches
+# ----------------------------------------------------------------
+def tokenize_cached(source, line_cache, positions, symbols):
+    """
+    interpreter.tokenize() with the tokens of each distinct line looked up
+    in `line_cache` first. The words of every line are interned in
+    `symbols` in the order tokenize() would intern them. Lines that fail to
+    tokenize are not cached, so error messages still name the right line.
+    """
+    if not source.strip():
+        raise interpreter.LexError("Error: Input content is empty.")
+
+    lines = source.split('\n')
+    token_lines = []
+    ids = symbols.ids
+    offset = 0
+    for line_no, line in enumerate(lines, start=1):
+        entry = line_cache.get(line)
+        if entry is None:
+            starts = []
+            words = interpreter.SymbolTable()
+            try:
+                tokens = interpreter.tokenize_line(line, line_no, starts, symbols=words)
+            except ValueError:
+                # tokenize() has recorded the tokens and words before the
+                # error too.
+                positions.line_starts.append(offset)
+                positions.starts.extend([offset + start for start in starts])
+                for word in words.names:
+                    symbols.intern(word)
+                raise
+            entry = (tokens, starts, words.names)
+            if len(line_cache) >= LINE_CACHE_SIZE:
+                line_cache.clear()
+            line_cache[line] = entry
+        tokens, starts, words = entry
+        for word in words:
+            if word not in ids:
+                symbols.intern(word)
+        token_lines.append(tokens)
+        positions.line_starts.append(offset)
+        positions.starts.extend([offset + start for start in starts])
+        offset += len(line) + 1
+    try:
+        interpreter.validate_token_lines(token_lines, len(lines))
+    except interpreter.LexError as e:
+        interpreter.cover_line(e, lines)
+        raise
+    return token_lines
+
+
+def analyze_batch(sources):
+    """
+    Analyze `sources` in this process with one SyntaxAnalyzer and one line
+    cache shared by the whole batch. A program the front end crashes on
+    gets an internal_error instead of ending the batch.
+    """
+    analyzer = SyntaxAnalyzer([], echo=False)
+    line_cache = {}
+    results = []
+    for source in sources:
+        result = AnalysisResult(source)
+        try:
+            try:
+                result.token_lines = tokenize_cached(source, line_cache, result.positions, result.symbols)
+            except ValueError as e:
+                result.lex_error = str(e)
+                result.lex_error_span = getattr(e, "span", None)
+            parse_tokens(result, analyzer)
+        except Exception as e:
+            result.tree = None
+            result.internal_error = f"{type(e).__name__}: {e}"
+        results.append(result)
+    return results
+
+
+def analyze_many(sources, jobs=1):
+    """
+    Analyze many programs and return their AnalysisResults in input order.
+    Nothing is printed. Each result holds what analyze_source() gives for
+    its program, but identical sources are analyzed once and all their
+    positions hold the same AnalysisResult object. Lines seen before are
+    not tokenized again, and programs share the token lists of such lines
+    too. So the results are read-only: a caller that changes one (e.g.
+    optimizes its tree) must take result.copy() first. With `jobs` > 1,
+    batches of BATCH_CHUNK_SIZE programs are spread over that many worker
+    processes.
+
+    The gain over one analyze_source() call per program comes almost all
+    from analyzing each distinct source once. On one CPU (best of 7 runs,
+    4000 generated programs, half of them repeats, few shared lines) it
+    runs about 9.4k programs/s against 5.0k/s; on distinct programs only
+    it is about 1.1x (5.6k vs 5.0k/s). jobs > 1 only helps when there are
+    cores to use.
+    """
+    sources = list(sources)
+    unique = list(dict.fromkeys(sources))
+
+    if jobs > 1 and len(unique) > BATCH_CHUNK_SIZE:
+        chunks = [unique[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(unique), BATCH_CHUNK_SIZE)]
+        unique_results = []
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for chunk_results in pool.map(analyze_batch, chunks):
+                unique_results.extend(chunk_results)
+    else:
+        unique_results = analyze_batch(unique)
+
+    if metrics.ENABLED:
+        for result in unique_results:
+            record_metrics(result)
+
+    by_source = dict(zip(unique, unique_results))
+    return [by_source[source] for source in sources]
+
+
+def render_output(result):
+    if result.internal_error is not None:
+        return f"Internal Error: {result.internal_error}"
+
+    if result.lex_error is not None or not result.token_lines:
+        lines = []
+        if result.lex_error is not None:
+            lines.append(f"Exception caught: {result.lex_error}")
+        lines.append("Lexical analysis encountered errors or returned no tokens.")
+        return "\n".join(lines)
+
+    if result.syntax_errors:
+        lines = list(result.syntax_errors)
+        lines.append(f"Syntax analysis encountered {len(result.syntax_errors)} error(s).")
+        return "\n".join(lines)
+
+    return "\n".join(format_parse_tree(result.tree))
@@ -0,0 +1,261 @@
+"""
+Inlining of small `trend` functions over SyntaxAnalyzer parse trees.
+
+inline_calls() rewrites a PROGRAM tree in place. It builds the call graph
+of the program (FUNCTION_DEF -> names of the FUNCTION_CALLs in its body),
+finds the recursive functions (those on a cycle of the graph) and replaces
+calls to the remaining ones when:
+  - the body is a single `reply <expression>`,
+  - the expression only uses the function's parameters and literals,
+  - the expression has at most `budget` nodes,
+  - the call passes one argument per parameter, and no argument assigns
+    or increments anything.
+The parameters are replaced by copies of the argument expressions. A
+parameter used more than once only takes a literal or a plain variable,
+so no work is repeated. A call used as a statement computes nothing that
+is kept, so the statement is dropped.
+
+FUNCTION_DEF nodes are left in place. Run optimize.optimize_tree()
+afterwards to fold constant arguments (`add(2, 3)` -> `5`).
+"""
+from syntax_analyzer import ParseTreeNode
+
+# Largest reply expression (in nodes) that is copied into a caller.
+INLINE_BUDGET = 16
+
+ASSIGNMENT_OPERATORS = {"=", "+=", "-=", "*=", "/=", "%=", "^="}
+
+TRIVIAL = {"INTEGER", "FLOAT_NUMBER", "STRING", "BOOLEAN", "IDENTIFIER"}
+
+
+class InlineReport:
+    def __init__(self):
+        self.call_graph = {}  # function name -> set of called names
+        self.recursive = set()
+        self.inlined = {}  # function name -> calls replaced
+        self.dropped_calls = 0
+
+    @property
+    def inlined_calls(self):
+        return sum(self.inlined.values())
+
+    def as_dict(self):
+        return {
+            "call_graph": {name: sorted(callees) for name, callees in self.call_graph.items()},
+            "recursive": sorted(self.recursive),
+            "inlined": dict(self.inlined),
+            "dropped_calls": self.dropped_calls,
+        }
+
+    def __str__(self):
+        return (f"Inliner: inlined {self.inlined_calls} call(s) of {len(self.inlined)} function(s), "
+                f"dropped {self.dropped_calls} call statement(s); "
+                f"{len(self.recursive)} recursive function(s) left alone.")
+
+
+def walk(node):
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(current.children)
+
+
+def copy_tree(node):
+    copy = ParseTreeNode(node.node_type, node.value)
+    symbol = getattr(node, "symbol", None)
+    if symbol is not None:
+        copy.symbol = symbol
+    copy.children = [copy_tree(child) for child in node.children]
+    return copy
+
+
+def has_side_effects(node):
+    for current in walk(node):
+        if current.node_type in ("POSTFIX_OP", "FUNCTION_CALL"):
+            return True
+        if current.node_type == "BINARY_OP" and current.value in ASSIGNMENT_OPERATORS:
+            return True
+    return False
+
+
+# ----------------------------------------------------------------
+# Call graph
+# ----------------------------------------------------------------
+def function_definitions(tree):
+    """
+    name -> FUNCTION_DEF for every function defined exactly once.
+    """
+    definitions = {}
+    duplicates = set()
+    for node in walk(tree):
+        if node.node_type == "FUNCTION_DEF":
+            if node.value in definitions:
+                duplicates.add(node.value)
+            definitions[node.value] = node
+    for name in duplicates:
+        del definitions[name]
+    return definitions
+
+
+def build_call_graph(definitions):
+    return {
+        name: {node.value for node in walk(definition) if node.node_type == "FUNCTION_CALL"}
+        for name, definition in definitions.items()
+    }
+
+
+def recursive_functions(call_graph):
+    """
+    Names of the functions that can end up calling themselves (Tarjan's
+    strongly connected components over `call_graph`).
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    recursive = set()
+
+    def connect(name):
+        index[name] = lowlink[name] = len(index)
+        stack.append(name)
+        on_stack.add(name)
+        for callee in call_graph[name]:
+            if callee not in call_graph:
+                continue
+            if callee not in index:
+                connect(callee)
+                lowlink[name] = min(lowlink[name], lowlink[callee])
+            elif callee in on_stack:
+                lowlink[name] = min(lowlink[name], index[callee])
+        if lowlink[name] == index[name]:
+            component = []
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                component.append(member)
+                if member == name:
+                    break
+            if len(component) > 1 or name in call_graph[name]:
+                recursive.update(component)
+
+    for name in call_graph:
+        if name not in index:
+            connect(name)
+    return recursive
+
+
+# ----------------------------------------------------------------
+# Candidates
+# ----------------------------------------------------------------
+class Candidate:
+    def __init__(self, params, expression):
+        self.params = params  # parameter names in order
+        self.expression = expression
+        self.uses = {name: 0 for name in params}
+        for node in walk(expression):
+            if node.node_type == "IDENTIFIER":
+                self.uses[node.value] += 1
+
+
+def candidate(definition, budget):
+    """
+    Candidate for a FUNCTION_DEF whose body is a single reply, or None.
+    """
+    if len(definition.children) < 2:
+        return None
+    params = [param.children[1].value for param in definition.children[0].children]
+    if len(set(params)) != len(params):
+        return None
+    statements = definition.children[1].children[0].children
+    if len(statements) != 1 or statements[0].node_type != "RETURN_STMT":
+        return None
+    expression = statements[0].children[0]
+
+    size = 0
+    for node in walk(expression):
+        size += 1
+        if node.node_type == "IDENTIFIER" and node.value not in params:
+            return None
+        if node.node_type in ("FUNCTION_CALL", "ARRAY_LITERAL"):
+            return None
+    if size > budget or has_side_effects(expression):
+        return None
+    return Candidate(params, expression)
+
+
+def expand(call, target):
+    """
+    The expression replacing `call`, or None if its arguments rule it out.
+    """
+    args = call.children
+    if len(args) != len(target.params):
+        return None
+    for name, arg in zip(target.params, args):
+        if has_side_effects(arg):
+            return None
+        if target.uses[name] > 1 and arg.node_type not in TRIVIAL:
+            return None
+    bound = dict(zip(target.params, args))
+
+    def substitute(node):
+        if node.node_type == "IDENTIFIER":
+            return copy_tree(bound[node.value])
+        copy = ParseTreeNode(node.node_type, node.value)
+        copy.children = [substitute(child) for child in node.children]
+        return copy
+
+    return substitute(target.expression)
+
+
+# ----------------------------------------------------------------
+# Rewriting
+# ----------------------------------------------------------------
+def inline_node(node, candidates, report):
+    if node.node_type == "STATEMENT_LIST":
+        statements = []
+        for stmt in node.children:
+            if stmt.node_type == "FUNCTION_STMT":
+                call = stmt.children[0]
+                target = candidates.get(call.value)
+                if target is not None and expand(call, target) is not None:
+                    report.dropped_calls += 1
+                    continue
+            statements.append(stmt)
+        node.children = statements
+
+    for index, child in enumerate(node.children):
+        if child.node_type == "FUNCTION_CALL" and node.node_type != "FUNCTION_STMT":
+            target = candidates.get(child.value)
+            replacement = expand(child, target) if target is not None else None
+            if replacement is not None:
+                node.children[index] = replacement
+                report.inlined[child.value] = report.inlined.get(child.value, 0) + 1
+                continue
+        inline_node(child, candidates, report)
+
+
+def inline_calls(tree, budget=INLINE_BUDGET):
+    """
+    Inline calls of small functions in the PROGRAM `tree` (see the module
+    docstring) and return an InlineReport.
+    """
+    report = InlineReport()
+    if tree is None:
+        return report
+
+    definitions = function_definitions(tree)
+    report.call_graph = build_call_graph(definitions)
+    report.recursive = recursive_functions(report.call_graph)
+
+    candidates = {}
+    for name, definition in definitions.items():
+        if name in report.recursive:
+            continue
+        target = candidate(definition, budget)
+        if target is not None:
+            candidates[name] = target
+
+    if candidates:
+        inline_node(tree, candidates, report)
+    return report
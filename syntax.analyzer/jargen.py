@@ -0,0 +1,297 @@
+"""
+JARGEN command line tool.
+
+    python jargen.py analyze PATH... [--jobs N] [--ext .jargen] [--watch [--poll] [--debounce S]]
+    python jargen.py daemon [--socket PATH]
+
+`analyze` walks the given files and directories for JARGEN sources, lexes
+and parses them across a pool of worker processes and writes one JSON line
+per file to stdout, in completion order:
+
+    {"path": "...", "ok": true, "tokens": 42, "category": null, "errors": [], "spans": []}
+
+where each span is [line, column, end_line, end_column] of the matching error.
+
+A summary (files, tokens, errors, throughput) goes to stderr.
+
+With --watch the tree is analyzed once and then watched (see watch.py):
+after every burst of saves only the files whose content actually changed
+are re-analyzed and written out again, and a file that disappears is
+reported as {"path": "...", "removed": true}. Stop it with Ctrl-C.
+
+`daemon` keeps the front end loaded and serves requests on a Unix domain
+socket; see daemon.py and the jargenc.py client.
+
+Exit codes:
+    0  every file analyzed without errors
+    1  at least one file has lexical or syntax errors
+    2  usage error, unreadable file, or no files found
+    3  the analyzer itself failed on at least one file (category "internal")
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+EXIT_OK = 0
+EXIT_ANALYSIS_ERRORS = 1
+EXIT_USAGE = 2
+EXIT_INTERNAL_ERROR = 3
+
+DEFAULT_EXTENSIONS = [".jargen"]
+
+# Files per task sent to a worker process; amortizes the IPC round trip for
+# the many tiny files of a typical submission tree.
+CHUNK_SIZE = 16
+
+
+def find_sources(paths, extensions):
+    """
+    Yield source files under `paths`, normalized with os.path.normpath().
+    Files named explicitly are always yielded; directories are walked for
+    files with one of `extensions`.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if os.path.splitext(name)[1] in extensions:
+                        yield os.path.normpath(os.path.join(root, name))
+        else:
+            yield os.path.normpath(path)
+
+
+def analyze_file(path, data=None):
+    """
+    Result dict of the file at `path`. `data` is its content as bytes when
+    the caller has already read it.
+    """
+    from frontend import analyze_source
+
+    try:
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        # Universal newlines, as when the file is opened in text mode.
+        source = io.StringIO(data.decode("utf-8"), newline=None).read()
+    except (OSError, UnicodeDecodeError) as e:
+        return {"path": path, "ok": False, "tokens": 0, "category": "io", "errors": [str(e)], "spans": [None]}
+
+    try:
+        result = analyze_source(source)
+    except Exception as e:
+        # A bug in the front end must not take the rest of the run down.
+        return {"path": path, "ok": False, "tokens": 0, "category": "internal",
+                "errors": [f"{type(e).__name__}: {e}"], "spans": [None]}
+    return {
+        "path": path,
+        "ok": result.ok,
+        "tokens": result.token_count,
+        "category": result.error_category,
+        "errors": result.errors,
+        "spans": result.spans,
+    }
+
+
+def analyze_chunk(files):
+    return [analyze_file(path, data) for path, data in files]
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_analysis(paths, jobs, contents=None):
+    """
+    Yield one result dict per file as soon as it is available. `contents`
+    maps paths to their content when it has already been read.
+    """
+    contents = contents or {}
+    files = ((path, contents.get(path)) for path in paths)
+    if jobs == 1:
+        for path, data in files:
+            yield analyze_file(path, data)
+        return
+
+    chunks = chunked(files, CHUNK_SIZE)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = set()
+        # Keep a bounded number of chunks in flight so huge trees do not
+        # queue every path up front.
+        for chunk in chunks:
+            pending.add(pool.submit(analyze_chunk, chunk))
+            if len(pending) >= jobs * 4:
+                break
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for result in future.result():
+                    yield result
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.add(pool.submit(analyze_chunk, chunk))
+
+
+class Summary:
+    def __init__(self):
+        self.files = 0
+        self.failed = 0
+        self.unreadable = 0
+        self.internal = 0
+        self.tokens = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+
+    def add(self, result):
+        self.files += 1
+        self.tokens += result["tokens"]
+        self.errors += len(result["errors"])
+        if result["category"] == "io":
+            self.unreadable += 1
+        elif result["category"] == "internal":
+            self.internal += 1
+        elif not result["ok"]:
+            self.failed += 1
+
+    def write(self, out):
+        elapsed = time.perf_counter() - self.started
+        out.write(
+            f"{self.files} file(s), {self.tokens} token(s), {self.errors} error(s) "
+            f"in {self.failed} file(s), {self.unreadable} unreadable, {self.internal} internal failure(s); "
+            f"{elapsed:.2f}s ({self.files / elapsed if elapsed else 0:.1f} files/s, "
+            f"{self.tokens / elapsed if elapsed else 0:.0f} tokens/s)\n"
+        )
+
+    def exit_code(self):
+        if self.files == 0 or self.unreadable:
+            return EXIT_USAGE
+        if self.internal:
+            return EXIT_INTERNAL_ERROR
+        if self.failed:
+            return EXIT_ANALYSIS_ERRORS
+        return EXIT_OK
+
+
+def command_analyze(args):
+    if args.watch:
+        return command_watch(args)
+    paths = find_sources(args.paths, set(args.ext or DEFAULT_EXTENSIONS))
+    summary = Summary()
+    out = sys.stdout
+    for result in run_analysis(paths, args.jobs):
+        summary.add(result)
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+    summary.write(sys.stderr)
+    if summary.files == 0:
+        sys.stderr.write("No JARGEN source files found.\n")
+    return summary.exit_code()
+
+
+def command_watch(args):
+    from watch import ResultCache, coalesce, make_watcher
+
+    extensions = set(args.ext or DEFAULT_EXTENSIONS)
+    # Start watching before the first pass so saves made during it are seen.
+    watcher = make_watcher(args.paths, extensions, polling=args.poll)
+    cache = ResultCache()
+    out = sys.stdout
+
+    def analyze(paths, jobs):
+        stale, removed = cache.stale_paths(paths)
+        for path in removed:
+            out.write(json.dumps({"path": path, "removed": True}) + "\n")
+        # Analyze the bytes that were hashed, not whatever is on disk by now.
+        digests = {path: digest for path, digest, data in stale}
+        contents = {path: data for path, digest, data in stale}
+        # A pool only pays off for batches larger than a single chunk.
+        jobs = jobs if len(stale) > CHUNK_SIZE else 1
+        for result in run_analysis(list(digests), jobs, contents):
+            cache.store(result["path"], digests[result["path"]], result)
+            out.write(json.dumps(result) + "\n")
+        out.flush()
+        return len(stale), len(removed)
+
+    def status(summary=None):
+        summary = summary or Summary()
+        for result in cache.results():
+            summary.add(result)
+        return summary
+
+    started = Summary()
+    analyze(list(find_sources(args.paths, extensions)), args.jobs)
+    status(started).write(sys.stderr)
+    sys.stderr.write(f"Watching for changes ({type(watcher).__name__}), press Ctrl-C to stop.\n")
+    try:
+        while True:
+            changed = coalesce(watcher, args.debounce)
+            analyzed, removed = analyze(changed, args.jobs)
+            if analyzed or removed:
+                summary = status()
+                sys.stderr.write(
+                    f"{analyzed} file(s) re-analyzed, {removed} removed; "
+                    f"{summary.files} file(s) watched, {summary.failed} with errors\n"
+                )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return status().exit_code()
+
+
+def command_daemon(args):
+    from daemon import serve
+    try:
+        return serve(args.socket)
+    except RuntimeError as e:
+        sys.stderr.write(f"{e}\n")
+        return EXIT_USAGE
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="jargen", description="JARGEN command line tool.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze = commands.add_parser("analyze", help="lex and parse JARGEN files")
+    analyze.add_argument("paths", nargs="+", metavar="PATH", help="files or directories to analyze")
+    analyze.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                         help="worker processes (default: number of CPUs)")
+    analyze.add_argument("--ext", action="append", metavar="EXT",
+                         help="file extension to collect from directories, repeatable (default: .jargen)")
+    analyze.add_argument("--watch", action="store_true",
+                         help="keep running and re-analyze files whose content changes")
+    analyze.add_argument("--poll", action="store_true",
+                         help="with --watch, poll (mtime, size) fingerprints instead of using inotify")
+    analyze.add_argument("--debounce", type=float, default=0.2, metavar="SECONDS",
+                         help="with --watch, wait for this much quiet before re-analyzing (default: 0.2)")
+    analyze.set_defaults(handler=command_analyze)
+
+    daemon = commands.add_parser("daemon", help="serve analysis requests on a Unix domain socket")
+    daemon.add_argument("--socket", metavar="PATH",
+                        help="socket path (default: $JARGEN_SOCKET or a per-user path in $XDG_RUNTIME_DIR or /tmp)")
+    daemon.set_defaults(handler=command_daemon)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "jobs", 1) < 1:
+        parser.error("--jobs must be at least 1")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Thin client for the JARGEN analysis daemon.
+
+    python jargenc.py [--op render|analyze|parse|lex] [--socket PATH] [SOURCE]
+
+The program text is taken from SOURCE, or from stdin when SOURCE is missing
+or "-". The request is forwarded to the daemon (see daemon.py); if no daemon
+is running the analysis is done in this process instead. `render` prints the
+same text as main.py, the other operations print the JSON response.
+
+Only standard library modules are imported up front so that start-up stays
+cheap; the analyzer itself is only imported for the in-process fallback.
+"""
+import json
+import socket
+import sys
+
+from protocol import default_socket_path, recv_message, send_message
+
+OPERATIONS = ("render", "analyze", "parse", "lex")
+
+
+def request_daemon(request, path):
+    """
+    Send `request` to the daemon at `path`. Returns None if no daemon is
+    listening there.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        send_message(sock, request)
+        return recv_message(sock)
+    finally:
+        sock.close()
+
+
+def request_in_process(request):
+    from daemon import handle_request
+    return handle_request(request)
+
+
+def parse_args(argv):
+    op = "render"
+    path = None
+    source = None
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == "--op" and args:
+            op = args.pop(0)
+        elif arg.startswith("--op="):
+            op = arg.split("=", 1)[1]
+        elif arg == "--socket" and args:
+            path = args.pop(0)
+        elif arg.startswith("--socket="):
+            path = arg.split("=", 1)[1]
+        elif source is None:
+            source = arg
+        else:
+            raise SystemExit("Usage: jargenc.py [--op render|analyze|parse|lex] [--socket PATH] [SOURCE]")
+    if op not in OPERATIONS:
+        raise SystemExit(f"Unknown --op '{op}'. Expected one of {', '.join(OPERATIONS)}.")
+    return op, path, source
+
+
+def main(argv=None):
+    op, path, source = parse_args(sys.argv[1:] if argv is None else argv)
+    if source is None or source == "-":
+        source = sys.stdin.read()
+
+    request = {"op": op, "source": source}
+    response = None
+    try:
+        response = request_daemon(request, path or default_socket_path())
+    except (OSError, ValueError):
+        response = None
+    if response is None:
+        response = request_in_process(request)
+
+    if op == "render" and "output" in response:
+        sys.stdout.write(response["output"] + "\n")
+    else:
+        sys.stdout.write(json.dumps(response) + "\n")
+    return 0 if response.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
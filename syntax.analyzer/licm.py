@@ -0,0 +1,213 @@
+"""
+Loop-invariant code motion for forreal (FOR_STMT) and talk (WHILE_STMT)
+loops.
+
+hoist_invariants() rewrites a PROGRAM tree in place. For every loop it
+computes the set of variables the loop assigns (the left side of
+ASSIGNMENT_OP and assigning BINARY_OPs, INCDEC_OP / POSTFIX_OP operands,
+DECLARATION and INPUT_STMT names, anywhere in the header or body). A loop
+that calls a `trend` function is also taken to assign every variable any
+function assigns. A BINARY_OP subtree of the loop condition, update or body
+is invariant when it has no side effects, uses at least one variable and
+none of the assigned ones. Each largest invariant subtree is computed once
+into a `flex` temporary declared just before the loop, and its occurrences
+in the loop read the temporary instead (identical subtrees share one).
+
+Inner loops are handled first, so a temporary of an inner loop can be
+hoisted again out of the outer loop. Temporaries are named hoist1, hoist2,
+... skipping names the program already uses.
+"""
+from inline import copy_tree, has_side_effects, walk
+from syntax_analyzer import ParseTreeNode
+
+ASSIGNMENT_OPERATORS = {"=", "+=", "-=", "*=", "/=", "%=", "^="}
+
+LOOPS = {"FOR_STMT", "WHILE_STMT"}
+
+TEMPORARY_PREFIX = "hoist"
+
+
+class Hoisted:
+    def __init__(self, loop, name, expression):
+        self.loop = loop  # "forreal" or "talk"
+        self.name = name
+        self.expression = expression  # source text of the hoisted expression
+
+    def as_dict(self):
+        return {"loop": self.loop, "temporary": self.name, "expression": self.expression}
+
+    def __str__(self):
+        return f"{self.loop}: {self.name} = {self.expression}"
+
+
+class MotionReport:
+    def __init__(self):
+        self.loops = 0
+        self.hoisted = []  # Hoisted, in the order they were made
+
+    def as_dict(self):
+        return {"loops": self.loops, "hoisted": [item.as_dict() for item in self.hoisted]}
+
+    def __str__(self):
+        lines = [f"Loop motion: hoisted {len(self.hoisted)} invariant expression(s) out of {self.loops} loop(s)."]
+        lines.extend(f"  {item}" for item in self.hoisted)
+        return "\n".join(lines)
+
+
+def expression_text(node):
+    """
+    Source-like text of an expression, with parentheses around nested
+    operations.
+    """
+    if node.node_type == "BINARY_OP" and len(node.children) == 2:
+        parts = []
+        for child in node.children:
+            text = expression_text(child)
+            parts.append(f"({text})" if child.node_type == "BINARY_OP" else text)
+        return f"{parts[0]} {node.value} {parts[1]}"
+    if node.node_type == "POSTFIX_OP" and node.children:
+        return f"{expression_text(node.children[0])}{node.value}"
+    if node.node_type == "ARRAY_LITERAL":
+        return "[" + ", ".join(expression_text(child) for child in node.children) + "]"
+    return str(node.value)
+
+
+def signature(node):
+    return (node.node_type, node.value, tuple(signature(child) for child in node.children))
+
+
+# ----------------------------------------------------------------
+# Assigned variables
+# ----------------------------------------------------------------
+def assigned_names(node):
+    """
+    Names written anywhere in `node`, and whether it calls a function.
+    """
+    names = set()
+    calls = False
+    for current in walk(node):
+        node_type = current.node_type
+        if node_type in ("ASSIGNMENT_OP", "ASSIGN_OP", "INCDEC_OP", "POSTFIX_OP", "INPUT_STMT", "DECLARATION"):
+            target = current.children[0] if current.children else None
+        elif node_type == "BINARY_OP" and current.value in ASSIGNMENT_OPERATORS:
+            target = current.children[0]
+        else:
+            if node_type == "FUNCTION_CALL":
+                calls = True
+            continue
+        if target is not None and target.node_type == "IDENTIFIER":
+            names.add(target.value)
+    return names, calls
+
+
+def function_writes(tree):
+    """
+    Every variable some FUNCTION_DEF of `tree` assigns (parameters and
+    locals included, which only makes the analysis more careful).
+    """
+    names = set()
+    for node in walk(tree):
+        if node.node_type == "FUNCTION_DEF":
+            names |= assigned_names(node)[0]
+    return names
+
+
+# ----------------------------------------------------------------
+# Motion
+# ----------------------------------------------------------------
+class LoopMotion:
+    def __init__(self, tree, report):
+        self.report = report
+        self.called_writes = function_writes(tree)
+        self.used_names = {node.value for node in walk(tree) if node.node_type == "IDENTIFIER"}
+        self.counter = 0
+
+    def temporary(self):
+        while True:
+            self.counter += 1
+            name = f"{TEMPORARY_PREFIX}{self.counter}"
+            if name not in self.used_names:
+                self.used_names.add(name)
+                return name
+
+    def is_invariant(self, node, assigned):
+        uses_variable = False
+        for current in walk(node):
+            if current.node_type == "IDENTIFIER":
+                if current.value in assigned:
+                    return False
+                uses_variable = True
+            elif current.node_type in ("FUNCTION_CALL", "ARRAY_LITERAL"):
+                return False
+        return uses_variable and not has_side_effects(node)
+
+    def replace_invariants(self, node, assigned, hoisted):
+        """
+        Replace the largest invariant BINARY_OP subtrees below `node` with
+        temporaries. `hoisted` maps subtree signatures to (name, expression).
+        """
+        for index, child in enumerate(node.children):
+            if child.node_type == "FUNCTION_DEF":
+                continue
+            if child.node_type == "BINARY_OP" and child.value not in ASSIGNMENT_OPERATORS \
+                    and self.is_invariant(child, assigned):
+                key = signature(child)
+                if key not in hoisted:
+                    hoisted[key] = (self.temporary(), child)
+                node.children[index] = ParseTreeNode("IDENTIFIER", hoisted[key][0])
+            else:
+                self.replace_invariants(child, assigned, hoisted)
+
+    def motion(self, loop):
+        """
+        Hoist the invariants of `loop` and return the declarations to put
+        before it.
+        """
+        self.report.loops += 1
+        assigned, calls = assigned_names(loop)
+        if calls:
+            assigned |= self.called_writes
+
+        hoisted = {}
+        # The first clause of a forreal header already runs only once.
+        start = 1 if loop.node_type == "FOR_STMT" else 0
+        holder = ParseTreeNode("LOOP")
+        holder.children = loop.children[start:]
+        self.replace_invariants(holder, assigned, hoisted)
+        loop.children[start:] = holder.children
+
+        kind = "forreal" if loop.node_type == "FOR_STMT" else "talk"
+        declarations = []
+        for name, expression in hoisted.values():
+            self.report.hoisted.append(Hoisted(kind, name, expression_text(expression)))
+            declaration = ParseTreeNode("DECLARATION", "flex")
+            declaration.add_child(ParseTreeNode("IDENTIFIER", name))
+            assign = ParseTreeNode("ASSIGN_OP", "=")
+            assign.add_child(ParseTreeNode("IDENTIFIER", name))
+            assign.add_child(copy_tree(expression))
+            declaration.add_child(assign)
+            declarations.append(declaration)
+        return declarations
+
+    def visit(self, node):
+        for child in node.children:
+            self.visit(child)
+        if node.node_type != "STATEMENT_LIST":
+            return
+        statements = []
+        for stmt in node.children:
+            if stmt.node_type in LOOPS:
+                statements.extend(self.motion(stmt))
+            statements.append(stmt)
+        node.children = statements
+
+
+def hoist_invariants(tree):
+    """
+    Move loop-invariant expressions of the PROGRAM `tree` out of their
+    loops (see the module docstring) and return a MotionReport.
+    """
+    report = MotionReport()
+    if tree is not None:
+        LoopMotion(tree, report).visit(tree)
+    return report
@@ -0,0 +1,347 @@
+"""
+Language Server Protocol server for JARGEN, over stdio.
+
+    python lsp_server.py
+
+Supports incremental text synchronization (textDocument/didChange with
+ranges) and publishes diagnostics from the lexer, the lexer's validation
+pass and SyntaxAnalyzer. Every open document keeps its lines and the tokens
+of each line in memory; an edit only drops the cached tokens of the lines
+it touches, so re-analysis re-tokenizes just those lines before validating
+and parsing. Analysis runs DEBOUNCE_SECONDS after the last edit, and an
+analysis that is overtaken by a newer edit stops at the next checkpoint
+without publishing anything.
+
+A handler or an analysis that fails is logged with its traceback on
+stderr: a request gets an InternalError response, an analysis publishes
+one diagnostic saying the analyzer failed, and the server keeps running.
+"""
+import json
+import sys
+import threading
+import traceback
+
+from interpreter import LexError, TokenPositions, cover_line, tokenize_line, validate_token_lines
+from syntax_analyzer import SyntaxAnalyzer
+
+DEBOUNCE_SECONDS = 0.15
+
+# How many lines to tokenize between checks for a newer edit.
+CANCEL_CHECK_LINES = 256
+
+SEVERITY_ERROR = 1
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+
+
+# ----------------------------------------------------------------
+# Position helpers (LSP columns count UTF-16 code units)
+# ----------------------------------------------------------------
+def utf16_to_index(line, offset):
+    if line.isascii():
+        return min(offset, len(line))
+    units = 0
+    for index, char in enumerate(line):
+        if units >= offset:
+            return index
+        units += 2 if ord(char) > 0xFFFF else 1
+    return len(line)
+
+
+def index_to_utf16(line, index):
+    if line.isascii():
+        return min(index, len(line))
+    return sum(2 if ord(char) > 0xFFFF else 1 for char in line[:index])
+
+
+# ----------------------------------------------------------------
+# Documents
+# ----------------------------------------------------------------
+class Document:
+    def __init__(self, uri, text, version):
+        self.uri = uri
+        self.version = version
+        self.lines = text.split("\n")
+        # (tokens, token start columns) per line, or None when it has to be redone
+        self.line_tokens = [None] * len(self.lines)
+        # bumped on every edit; an analysis only publishes if it still matches
+        self.generation = 0
+        self.timer = None
+
+    def apply_change(self, change):
+        if "range" not in change:
+            self.lines = change["text"].split("\n")
+            self.line_tokens = [None] * len(self.lines)
+            return
+
+        start = change["range"]["start"]
+        end = change["range"]["end"]
+        start_line = min(start["line"], len(self.lines) - 1)
+        end_line = min(end["line"], len(self.lines) - 1)
+        first = self.lines[start_line]
+        last = self.lines[end_line]
+        prefix = first[:utf16_to_index(first, start["character"])]
+        suffix = last[utf16_to_index(last, end["character"]):]
+
+        new_lines = (prefix + change["text"] + suffix).split("\n")
+        self.lines[start_line:end_line + 1] = new_lines
+        self.line_tokens[start_line:end_line + 1] = [None] * len(new_lines)
+
+
+class Superseded(Exception):
+    pass
+
+
+# ----------------------------------------------------------------
+# Server
+# ----------------------------------------------------------------
+class LanguageServer:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.write_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.documents = {}
+        self.shutdown_requested = False
+
+    # -- transport -------------------------------------------------
+    def read_message(self):
+        length = None
+        while True:
+            header = self.reader.readline()
+            if not header:
+                return None
+            header = header.strip()
+            if not header:
+                break
+            name, _, value = header.decode("ascii").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value.strip())
+        if length is None:
+            return None
+        return json.loads(self.reader.read(length).decode("utf-8"))
+
+    def send(self, message):
+        message["jsonrpc"] = "2.0"
+        body = json.dumps(message).encode("utf-8")
+        with self.write_lock:
+            self.writer.write(f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+            self.writer.flush()
+
+    def respond(self, request_id, result=None, error=None):
+        message = {"id": request_id}
+        if error is not None:
+            message["error"] = error
+        else:
+            message["result"] = result
+        self.send(message)
+
+    def notify(self, method, params):
+        self.send({"method": method, "params": params})
+
+    def log_exception(self, context):
+        sys.stderr.write(f"jargen-lsp: {context} failed\n{traceback.format_exc()}")
+        sys.stderr.flush()
+
+    # -- main loop -------------------------------------------------
+    def serve(self):
+        while True:
+            try:
+                message = self.read_message()
+            except ValueError as e:
+                self.log_exception("reading a message")
+                self.respond(None, error={"code": PARSE_ERROR, "message": f"Invalid message: {e}"})
+                continue
+            if message is None:
+                return 1
+            method = message.get("method")
+            request_id = message.get("id")
+            params = message.get("params") or {}
+
+            if method == "exit":
+                return 0 if self.shutdown_requested else 1
+
+            handler = getattr(self, "on_" + (method or "").replace("/", "_").replace("$", "_"), None)
+            if handler is None:
+                if request_id is not None:
+                    self.respond(request_id, error={"code": METHOD_NOT_FOUND, "message": f"Unsupported method {method}."})
+                continue
+            try:
+                result = handler(params)
+            except Exception as e:
+                self.log_exception(method)
+                if request_id is not None:
+                    self.respond(request_id, error={"code": INTERNAL_ERROR, "message": f"{type(e).__name__}: {e}"})
+                continue
+            if request_id is not None:
+                self.respond(request_id, result)
+
+    # -- lifecycle -------------------------------------------------
+    def on_initialize(self, params):
+        return {
+            "capabilities": {
+                "textDocumentSync": {"openClose": True, "change": 2},
+            },
+            "serverInfo": {"name": "jargen-lsp"},
+        }
+
+    def on_initialized(self, params):
+        return None
+
+    def on_shutdown(self, params):
+        self.shutdown_requested = True
+        with self.lock:
+            for document in self.documents.values():
+                if document.timer:
+                    document.timer.cancel()
+        return None
+
+    # -- text synchronization --------------------------------------
+    def on_textDocument_didOpen(self, params):
+        item = params["textDocument"]
+        document = Document(item["uri"], item["text"], item.get("version"))
+        with self.lock:
+            self.documents[document.uri] = document
+        self.schedule(document)
+
+    def on_textDocument_didChange(self, params):
+        uri = params["textDocument"]["uri"]
+        with self.lock:
+            document = self.documents.get(uri)
+            if document is None:
+                return None
+            for change in params.get("contentChanges", []):
+                document.apply_change(change)
+            document.version = params["textDocument"].get("version")
+            document.generation += 1
+        self.schedule(document)
+
+    def on_textDocument_didClose(self, params):
+        uri = params["textDocument"]["uri"]
+        with self.lock:
+            document = self.documents.pop(uri, None)
+            if document is None:
+                return None
+            document.generation += 1
+            if document.timer:
+                document.timer.cancel()
+        self.notify("textDocument/publishDiagnostics", {"uri": uri, "diagnostics": []})
+
+    def on_textDocument_didSave(self, params):
+        return None
+
+    # -- analysis --------------------------------------------------
+    def schedule(self, document):
+        with self.lock:
+            if document.timer:
+                document.timer.cancel()
+            generation = document.generation
+            document.timer = threading.Timer(DEBOUNCE_SECONDS, self.run_analysis, (document, generation))
+            document.timer.daemon = True
+            document.timer.start()
+
+    def run_analysis(self, document, generation):
+        try:
+            diagnostics = self.analyze(document, generation)
+        except Superseded:
+            return
+        except Exception as e:
+            self.log_exception(f"analysis of {document.uri}")
+            diagnostics = [self.diagnostic(list(document.lines), f"Internal analyzer error: {type(e).__name__}: {e}", None)]
+        with self.lock:
+            if document.generation != generation or self.documents.get(document.uri) is not document:
+                return
+            version = document.version
+        self.notify("textDocument/publishDiagnostics",
+                    {"uri": document.uri, "version": version, "diagnostics": diagnostics})
+
+    def check_current(self, document, generation):
+        if document.generation != generation:
+            raise Superseded()
+
+    def analyze(self, document, generation):
+        with self.lock:
+            self.check_current(document, generation)
+            lines = list(document.lines)
+            cache = list(document.line_tokens)
+
+        diagnostics = []
+        token_lines = []
+        positions = TokenPositions()
+        offset = 0
+        for n, line in enumerate(lines):
+            if n % CANCEL_CHECK_LINES == 0:
+                self.check_current(document, generation)
+            entry = cache[n]
+            if entry is None:
+                starts = []
+                try:
+                    entry = (tokenize_line(line, n + 1, starts), starts)
+                except ValueError as e:
+                    span = getattr(e, "span", None) or (n + 1, None, n + 1, None)
+                    diagnostics.append(self.diagnostic(lines, str(e), span))
+                    entry = ([], [])
+                else:
+                    cache[n] = entry
+            tokens, starts = entry
+            token_lines.append(tokens)
+            positions.line_starts.append(offset)
+            positions.starts.extend([offset + start for start in starts])
+            offset += len(line) + 1
+
+        with self.lock:
+            if document.generation == generation:
+                document.line_tokens = cache
+
+        if diagnostics or not any(token_lines):
+            return diagnostics
+
+        self.check_current(document, generation)
+        try:
+            validate_token_lines(token_lines, len(lines))
+        except LexError as e:
+            cover_line(e, lines)
+            return [self.diagnostic(lines, str(e), e.span)]
+
+        self.check_current(document, generation)
+        analyzer = SyntaxAnalyzer(token_lines, echo=False, positions=positions)
+        analyzer.parse_program()
+        for error, span in zip(analyzer.errors, analyzer.error_spans):
+            diagnostics.append(self.diagnostic(lines, error, span))
+        return diagnostics
+
+    def position(self, lines, line, column):
+        n = max(0, min(line - 1, len(lines) - 1))
+        text = lines[n]
+        return {"line": n, "character": index_to_utf16(text, min(max(column - 1, 0), len(text)))}
+
+    def diagnostic(self, lines, message, span):
+        """
+        Build an LSP diagnostic for `message` covering `span` (1-based line,
+        column, end_line, end_column). Missing columns cover the whole line,
+        a missing span the first line.
+        """
+        line, column, end_line, end_column = span or (1, None, 1, None)
+        if column is None:
+            column, end_column = 1, len(lines[max(0, min(line - 1, len(lines) - 1))]) + 1
+        return {
+            "range": {
+                "start": self.position(lines, line, column),
+                "end": self.position(lines, end_line, end_column),
+            },
+            "severity": SEVERITY_ERROR,
+            "source": "jargen",
+            "message": message,
+        }
+
+
+def main():
+    server = LanguageServer(sys.stdin.buffer, sys.stdout.buffer)
+    return server.serve()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,19 @@
+import copy
 from sys import *
 from interpreter import *
 from syntax_analyzer import *
 
 def syntax_analyze(source_code):
-    # 1) Call parse() function which wraps the lexer
-    token_lines = parse(source_code)  
+    # 1) Call parse() function which wraps the lexer; the token positions
+    #    let syntax errors name their line and column
+    positions = TokenPositions()
+    token_lines = parse(source_code, positions)  
     if not token_lines:
         print("Lexical analysis encountered errors or returned no tokens.")
         return None
 
     # 2) Create the syntax analyzer
-    analyzer = SyntaxAnalyzer(token_lines)
+    analyzer = SyntaxAnalyzer(token_lines, positions=positions)
     parse_tree = analyzer.parse_program()
 
     # 3) Check for errors
@@ -33,10 +36,154 @@ def print_parse_tree(node, indent=0):
     for child in node.children:
         print_parse_tree(child, indent + 1)
 
+def optimize_parse_tree(tree, symbols=None):
+    from inline import inline_calls
+    from licm import hoist_invariants
+    from optimize import optimize_tree
+    from simplify import simplify_tree
+    from type_inference import infer_types, kind_of
+    stderr.write(f"{inline_calls(tree)}\n")
+    infer_types(tree, symbols)
+    stderr.write(f"{simplify_tree(tree, kind_of)}\n")
+    report = optimize_tree(tree)
+    stderr.write(f"{report}\n")
+    stderr.write(f"{hoist_invariants(tree)}\n")
+
+def resolve_parse_tree(tree, symbols=None):
+    from resolve import resolve_tree
+    resolution = resolve_tree(tree, symbols)
+    for error in resolution.errors:
+        stderr.write(f"{error}\n")
+
+def check_types(tree, symbols=None):
+    from type_inference import infer_types
+    report = infer_types(tree, symbols)
+    for error in report.errors:
+        stderr.write(f"{error}\n")
+    stderr.write(f"{report}\n")
+
+def check_purity(tree, symbols=None):
+    from purity import analyze_purity
+    from resolve import resolve_tree
+    resolve_tree(tree, symbols)
+    stderr.write(f"{analyze_purity(tree)}\n")
+
+def run_parse_tree(tree, symbols=None):
+    from evaluator import EvaluationError, run_tree
+    try:
+        run_tree(tree, symbols=symbols)
+    except EvaluationError as e:
+        print(f"Runtime Error: {e}")
+
+def program_output(tree, symbols, read=input):
+    from evaluator import EvaluationError, run_tree
+    lines = []
+    try:
+        run_tree(tree, lines.append, read, symbols=symbols)
+    except EvaluationError as e:
+        lines.append(f"Runtime Error: {e}")
+    return lines
+
+class RecordedInput:
+    """
+    Reads lines from `read` once and replays them, so several runs of a
+    program see the same input. Each reader() starts at the first line.
+    """
+    def __init__(self, read=input):
+        self.read = read
+        self.lines = []
+
+    def reader(self):
+        position = 0
+
+        def read():
+            nonlocal position
+            if position == len(self.lines):
+                self.lines.append(self.read())
+            position += 1
+            return self.lines[position - 1]
+        return read
+
+def check_optimized_run(tree, read=input):
+    """
+    Run the parse tree `tree` as is and after -O and report whether the
+    printed lines differ. Both runs get the same lines of input. Returns
+    True when they are the same.
+    """
+    recorded = RecordedInput(read)
+    optimized_tree = copy.deepcopy(tree)
+    plain = program_output(tree, SymbolTable(), recorded.reader())
+    symbols = SymbolTable()
+    optimize_parse_tree(optimized_tree, symbols)
+    optimized = program_output(optimized_tree, symbols, recorded.reader())
+    if plain == optimized:
+        stderr.write(f"-O check: same output ({len(plain)} line(s)).\n")
+        return True
+    stderr.write("-O check: output differs.\n")
+    for index in range(max(len(plain), len(optimized))):
+        before = plain[index] if index < len(plain) else "<none>"
+        after = optimized[index] if index < len(optimized) else "<none>"
+        if before != after:
+            stderr.write(f"  line {index + 1}: {before!r} -> {after!r}\n")
+    return False
+
+def write_records(source, fmt, optimize=False, resolve=False, types=False):
+    from frontend import analyze_source
+    from output_formats import RecordWriter, analysis_records
+
+    result = analyze_source(source)
+    if optimize and result.tree:
+        optimize_parse_tree(result.tree, result.symbols)
+    if resolve and result.tree:
+        resolve_parse_tree(result.tree, result.symbols)
+    if types and result.tree:
+        check_types(result.tree, result.symbols)
+    writer = RecordWriter(fmt)
+    writer.write_all(analysis_records(result))
+    writer.close()
+
 if __name__ == "__main__":
+    from output_formats import split_format_arg
+    fmt, args = split_format_arg(argv[1:])
+    # -O / --optimize: inline small functions, simplify and fold expressions, drop dead
+    # code and hoist loop invariants
+    optimize = "-O" in args or "--optimize" in args
+    # --resolve: check variable scopes (undeclared names, writes to nocap)
+    resolve = "--resolve" in args
+    # --types: infer variable types and report type conflicts
+    types = "--types" in args
+    # --purity: report which trend functions are pure (and memoized by --run)
+    purity = "--purity" in args
+    # --run: execute the program instead of printing its parse tree
+    run = "--run" in args
+    # --check-optimize: run the program with and without -O and compare what it prints
+    check_optimize = "--check-optimize" in args
+    args = [arg for arg in args if arg not in ("-O", "--optimize", "--resolve", "--types", "--purity", "--run",
+                                               "--check-optimize")]
 
-    if len(argv) > 1:
+    if not args:
+        print("No input provided.")
+    elif check_optimize:
+        tree = syntax_analyze(args[0])
+        if tree is not None and not check_optimized_run(tree):
+            exit(1)
+    elif fmt == "text":
         # print("\n=== PARSE TREE ===")
-        print(print_parse_tree(syntax_analyze(argv[1])))
+        tree = syntax_analyze(args[0])
+        # One table for every pass, so their symbol ids agree.
+        symbols = SymbolTable()
+        if optimize and tree:
+            optimize_parse_tree(tree, symbols)
+        if resolve and tree:
+            resolve_parse_tree(tree, symbols)
+        if types and tree:
+            check_types(tree, symbols)
+        if purity and tree:
+            check_purity(tree, symbols)
+        if run:
+            if tree:
+                run_parse_tree(tree, symbols)
+        else:
+            print_parse_tree(tree)
     else:
-        print("No input provided.")
\ No newline at end of file
+        write_records(args[0], fmt, optimize, resolve, types)
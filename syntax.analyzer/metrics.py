@@ -0,0 +1,313 @@
+"""
+Minimal in-process metrics in the Prometheus text exposition format, plus
+per-request resource accounting (PhaseProfile).
+
+Nothing is measured until enable() is called or a PhaseProfile is
+activated: the lexer and the syntax analyzer only check a module-level hook
+that is None by default, so a disabled build pays a single attribute test
+per lexer() / parse_program() call. Metrics are per process; each worker
+exposes its own.
+"""
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from time import perf_counter, thread_time
+
+import interpreter
+import syntax_analyzer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENABLED = False
+
+# Latency buckets in seconds, from 100us up to 10s.
+TIME_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Size buckets for source bytes and token counts.
+SIZE_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _format_labels(label_name, label_value, extra=""):
+    parts = []
+    if label_name is not None:
+        parts.append(f'{label_name}="{label_value}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """
+    A monotonically increasing count, optionally split by one label.
+    """
+    kind = "counter"
+
+    def __init__(self, name, help_text, label=None):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, label_value=None, amount=1):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items(), key=lambda item: str(item[0]))
+        for label_value, value in values:
+            yield self.name + _format_labels(self.label, label_value), value
+
+
+class Gauge:
+    """
+    A value that can go up and down. If `callback` is given it is called at
+    scrape time instead of storing a value, so the instrumented code does
+    not have to do anything.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help_text, callback=None):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+        self.value = 0
+        REGISTRY.append(self)
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self):
+        value = self.callback() if self.callback else self.value
+        yield self.name, value
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets, optionally split by one label.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets, label=None):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label = label
+        self._series = {}  # label value -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, label_value=None):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            series_items = sorted(
+                ((label_value, list(series)) for label_value, series in self._series.items()),
+                key=lambda item: str(item[0])
+            )
+        for label_value, series in series_items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="' + _format_number(float(bound)) + '"'
+                yield self.name + "_bucket" + _format_labels(self.label, label_value, le), cumulative
+            le = 'le="+Inf"'
+            yield self.name + "_bucket" + _format_labels(self.label, label_value, le), series[-1]
+            yield self.name + "_sum" + _format_labels(self.label, label_value), series[-2]
+            yield self.name + "_count" + _format_labels(self.label, label_value), series[-1]
+
+
+REGISTRY = []
+
+PHASE_SECONDS = Histogram(
+    "jargen_phase_seconds",
+    "Time spent in each analysis phase (lex, validate, parse, render).",
+    TIME_BUCKETS,
+    label="phase",
+)
+
+SOURCE_BYTES = Histogram(
+    "jargen_source_bytes",
+    "Size of analyzed source programs in bytes.",
+    SIZE_BUCKETS,
+)
+
+TOKEN_COUNT = Histogram(
+    "jargen_token_count",
+    "Number of tokens produced per analyzed program.",
+    SIZE_BUCKETS,
+)
+
+ERRORS = Counter(
+    "jargen_errors_total",
+    "Analysis errors by category (lexical, syntax, internal).",
+    label="category",
+)
+
+# Filled by the analyzer front end itself, so only by a process that runs it.
+ANALYZER_METRICS = (PHASE_SECONDS, SOURCE_BYTES, TOKEN_COUNT)
+
+
+# ----------------------------------------------------------------
+# Per-request resource accounting
+# ----------------------------------------------------------------
+_local = threading.local()
+
+
+class PhaseProfile:
+    """
+    Wall time, CPU time and peak traced memory of each phase run by the
+    current thread while the profile is active (see profile_phases()).
+
+    Memory is only measured while tracemalloc is tracing. tracemalloc is
+    process-wide, so peaks can include allocations made by other threads
+    running at the same time. The same holds for the CPU time of child
+    processes (see measure()): it includes children that other threads
+    waited for during the phase.
+    """
+    def __init__(self):
+        self.phases = {}
+        self._open = {}
+
+    def begin(self, phase, cpu_clock=thread_time):
+        memory_base = None
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            memory_base = tracemalloc.get_traced_memory()[0]
+        self._open[phase] = (cpu_clock, cpu_clock(), memory_base)
+
+    def end(self, phase, wall):
+        cpu_clock, cpu_started, memory_base = self._open.pop(phase)
+        entry = self.phases.setdefault(phase, {"wall": 0.0, "cpu": 0.0})
+        entry["wall"] += wall
+        entry["cpu"] += cpu_clock() - cpu_started
+        if memory_base is not None:
+            peak = tracemalloc.get_traced_memory()[1] - memory_base
+            entry["peak_bytes"] = max(entry.get("peak_bytes", 0), peak)
+
+    @contextmanager
+    def measure(self, phase, children=False):
+        """
+        Measure a phase that does not go through the lexer/parser hooks.
+        With `children`, the CPU time is that of the child processes run
+        and waited for inside the block rather than this thread's.
+        """
+        self.begin(phase, children_cpu_time if children else thread_time)
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.end(phase, perf_counter() - started)
+
+    def as_dict(self):
+        return {phase: dict(entry) for phase, entry in self.phases.items()}
+
+
+def children_cpu_time():
+    """
+    User + system CPU time of the terminated child processes of this
+    process (0 where the resource module is not available).
+    """
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+@contextmanager
+def profile_phases(profile):
+    """
+    Make `profile` collect the phases run by this thread inside the block.
+    """
+    _install_timer()
+    previous = getattr(_local, "profile", None)
+    _local.profile = profile
+    try:
+        yield profile
+    finally:
+        _local.profile = previous
+
+
+class PhaseTimer:
+    """
+    Installed as interpreter.phase_timer / syntax_analyzer.phase_timer.
+    Records phase durations with the monotonic perf_counter clock into the
+    histograms (when ENABLED) and into this thread's active PhaseProfile.
+    """
+    def start(self, phase):
+        profile = getattr(_local, "profile", None)
+        if profile is not None:
+            profile.begin(phase)
+        return perf_counter()
+
+    def stop(self, phase, started):
+        elapsed = perf_counter() - started
+        if ENABLED:
+            PHASE_SECONDS.observe(elapsed, phase)
+        profile = getattr(_local, "profile", None)
+        if profile is not None:
+            profile.end(phase, elapsed)
+
+
+def _install_timer():
+    if interpreter.phase_timer is None or syntax_analyzer.phase_timer is None:
+        timer = PhaseTimer()
+        interpreter.phase_timer = timer
+        syntax_analyzer.phase_timer = timer
+
+
+def enable():
+    global ENABLED
+    _install_timer()
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    interpreter.phase_timer = None
+    syntax_analyzer.phase_timer = None
+    ENABLED = False
+
+
+def unregister(*metrics):
+    """
+    Stop exporting `metrics`, e.g. ANALYZER_METRICS in a process that does
+    not run the analyzer.
+    """
+    REGISTRY[:] = [metric for metric in REGISTRY if metric not in metrics]
+
+
+def render():
+    """
+    Return every registered metric in the Prometheus text format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for sample_name, value in metric.samples():
+            lines.append(f"{sample_name} {_format_number(value)}")
+    return "\n".join(lines) + "\n"
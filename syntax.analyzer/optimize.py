@@ -0,0 +1,285 @@
+"""
+Tree-level optimizations over SyntaxAnalyzer parse trees.
+
+optimize_tree() rewrites a PROGRAM tree in place:
+  - BINARY_OP nodes whose operands are INTEGER / FLOAT_NUMBER / STRING (or
+    already folded BOOLEAN) literals are folded into a single literal.
+    Comparisons and && / || fold to BOOLEAN(tru) / BOOLEAN(barbers).
+  - IF_CHAIN branches whose condition is constant are pruned. A chain that
+    is left with one unconditional branch becomes a BLOCK (so declarations
+    keep their scope); a chain with no branch left disappears.
+  - Statements after a `reply` in a statement list inside a FUNCTION_DEF
+    are dropped as unreachable.
+
+Only operations whose result does not depend on JavaScript/Python semantic
+differences are folded: integer division only when exact, `%` only on
+non-negative integers, `^` only with small non-negative integer exponents.
+Expressions are folded as the parser grouped them (left to right, no
+precedence).
+"""
+from syntax_analyzer import ParseTreeNode
+
+LITERALS = {"INTEGER", "FLOAT_NUMBER", "STRING", "BOOLEAN"}
+
+TRUE = "tru"
+FALSE = "barbers"
+
+# Largest exponent `^` is folded with, so folding cannot blow up.
+MAX_FOLDED_EXPONENT = 64
+
+
+class OptimizationReport:
+    def __init__(self):
+        self.folded = 0
+        self.pruned_branches = 0
+        self.unreachable = 0
+        self.nodes_before = 0
+        self.nodes_after = 0
+
+    @property
+    def nodes_removed(self):
+        return self.nodes_before - self.nodes_after
+
+    def as_dict(self):
+        return {
+            "folded": self.folded,
+            "pruned_branches": self.pruned_branches,
+            "unreachable": self.unreachable,
+            "nodes_removed": self.nodes_removed,
+        }
+
+    def __str__(self):
+        return (f"Optimizer: folded {self.folded} expression(s), pruned {self.pruned_branches} branch(es), "
+                f"dropped {self.unreachable} unreachable statement(s); "
+                f"{self.nodes_removed} of {self.nodes_before} node(s) removed.")
+
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        count += 1
+        stack.extend(current.children)
+    return count
+
+
+# ----------------------------------------------------------------
+# Literal values
+# ----------------------------------------------------------------
+def literal_value(node):
+    """
+    Python value of a literal node, or None if `node` is not a literal.
+    """
+    if node.node_type == "INTEGER":
+        return int(node.value)
+    if node.node_type == "FLOAT_NUMBER":
+        return float(node.value)
+    if node.node_type == "STRING":
+        return node.value[1:-1]
+    if node.node_type == "BOOLEAN":
+        return node.value == TRUE
+    return None
+
+
+def literal_node(value, like=None):
+    """
+    Literal node for a folded `value`. Strings reuse the quote character of
+    `like` (the left operand).
+    """
+    if isinstance(value, bool):
+        return ParseTreeNode("BOOLEAN", TRUE if value else FALSE)
+    if isinstance(value, int):
+        return ParseTreeNode("INTEGER", str(value))
+    if isinstance(value, float):
+        return ParseTreeNode("FLOAT_NUMBER", repr(value))
+    quote = like.value[0] if like is not None else '"'
+    return ParseTreeNode("STRING", f"{quote}{value}{quote}")
+
+
+def truthy(node):
+    """
+    True / False for a constant condition, None if it is not constant.
+    """
+    if node.node_type not in LITERALS:
+        return None
+    return bool(literal_value(node))
+
+
+# ----------------------------------------------------------------
+# Folding
+# ----------------------------------------------------------------
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def fold_values(op, left, right):
+    """
+    Result of `left op right`, or None when it should not be folded.
+    """
+    if is_number(left) and is_number(right):
+        both_int = isinstance(left, int) and isinstance(right, int)
+        if op == "+":
+            return left + right
+        if op == "-":
+            return left - right
+        if op == "*":
+            return left * right
+        if op == "/":
+            if right == 0:
+                return None
+            if both_int:
+                return left // right if left % right == 0 else None
+            return left / right
+        if op == "%":
+            if both_int and left >= 0 and right > 0:
+                return left % right
+            return None
+        if op == "^":
+            if both_int and 0 <= right <= MAX_FOLDED_EXPONENT:
+                return left ** right
+            if not both_int and right in (0, 1, 2):
+                return float(left) ** right
+            return None
+        if op in COMPARISONS:
+            return COMPARISONS[op](left, right)
+        return None
+
+    if isinstance(left, str) and isinstance(right, str):
+        if op == "+":
+            return left + right
+        if op == "==":
+            return left == right
+        if op == "!=":
+            return left != right
+        return None
+
+    if isinstance(left, bool) and isinstance(right, bool):
+        if op == "&&":
+            return left and right
+        if op == "||":
+            return left or right
+        if op == "==":
+            return left == right
+        if op == "!=":
+            return left != right
+    return None
+
+
+COMPARISONS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">": lambda a, b: a > b,
+    "<": lambda a, b: a < b,
+    ">=": lambda a, b: a >= b,
+    "<=": lambda a, b: a <= b,
+}
+
+
+def fold(node, report):
+    """
+    Fold constant BINARY_OP subtrees of `node` bottom-up. Returns the node
+    that replaces `node` (itself if nothing changed).
+    """
+    for index, child in enumerate(node.children):
+        node.children[index] = fold(child, report)
+
+    if node.node_type != "BINARY_OP" or len(node.children) != 2:
+        return node
+    left, right = node.children
+    if left.node_type not in LITERALS or right.node_type not in LITERALS:
+        return node
+    if left.node_type == "STRING" and right.node_type == "STRING" and node.value == "+":
+        quote = left.value[0]
+        if quote in literal_value(right):
+            return node
+    value = fold_values(node.value, literal_value(left), literal_value(right))
+    if value is None:
+        return node
+    report.folded += 1
+    return literal_node(value, left)
+
+
+# ----------------------------------------------------------------
+# Dead code
+# ----------------------------------------------------------------
+def prune_if_chain(chain, report):
+    """
+    Drop the branches of an IF_CHAIN that can never run. Returns the
+    replacement statement, or None when nothing of the chain is left.
+    """
+    branches = []
+    for branch in chain.children:
+        if branch.node_type == "ELSE_BLOCK":
+            branches.append(branch)
+            break
+        condition = truthy(branch.children[0])
+        if condition is False:
+            continue
+        branches.append(branch)
+        if condition is True:
+            # Nothing after an always-taken branch can run.
+            break
+    report.pruned_branches += len(chain.children) - len(branches)
+
+    if not branches:
+        return None
+
+    first = branches[0]
+    if first.node_type == "ELSE_BLOCK" or truthy(first.children[0]) is True:
+        block = ParseTreeNode("BLOCK")
+        block.add_child(first.children[-1])
+        return block
+
+    if first.node_type == "ELSE_IF_BLOCK":
+        first.node_type = "IF_BLOCK"
+    chain.children = branches
+    return chain
+
+
+def optimize_statements(stmt_list, in_function, report):
+    statements = []
+    for position, stmt in enumerate(stmt_list.children):
+        stmt = optimize_node(stmt, in_function, report)
+        if stmt is None:
+            continue
+        statements.append(stmt)
+        if in_function and stmt.node_type == "RETURN_STMT":
+            report.unreachable += len(stmt_list.children) - position - 1
+            break
+    stmt_list.children = statements
+
+
+def optimize_node(node, in_function, report):
+    """
+    Optimize `node` and return its replacement (None to drop it).
+    """
+    if node.node_type == "STATEMENT_LIST":
+        optimize_statements(node, in_function, report)
+        return node
+
+    if node.node_type == "FUNCTION_DEF":
+        in_function = True
+
+    for index, child in enumerate(node.children):
+        if child.node_type == "BINARY_OP":
+            node.children[index] = fold(child, report)
+        else:
+            node.children[index] = optimize_node(child, in_function, report)
+
+    if node.node_type == "IF_CHAIN":
+        return prune_if_chain(node, report)
+    return node
+
+
+def optimize_tree(tree):
+    """
+    Optimize the PROGRAM `tree` in place and return an OptimizationReport.
+    """
+    report = OptimizationReport()
+    if tree is None:
+        return report
+    report.nodes_before = count_nodes(tree)
+    optimize_node(tree, False, report)
+    report.nodes_after = count_nodes(tree)
+    return report
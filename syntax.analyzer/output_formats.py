@@ -0,0 +1,201 @@
+"""
+Machine-readable output for the command line tools (`--format=...`).
+
+Everything is written as a stream of flat records:
+
+    {"kind": "token", "line": 1, "column": 1, "type": "Keyword", "value": "flex"}
+    {"kind": "node", "id": 0, "parent": null, "depth": 0, "type": "PROGRAM", "value": null}
+    {"kind": "error", "category": "syntax", "message": "...", "span": [2, 5, 2, 9]}
+
+Nodes come in pre-order, so a consumer can rebuild the tree from "parent".
+A span is [line, column, end_line, end_column] (1-based, end exclusive),
+or null when the error has no position.
+The formats differ only in how the records are framed:
+  - jsonl   : one JSON object per line
+  - json    : a single JSON array of the records
+  - msgpack : the records as consecutive MessagePack maps
+Output is encoded to bytes and handed to stdout in large blocks.
+"""
+import json
+import struct
+import sys
+
+import interpreter
+
+FORMATS = ("text", "jsonl", "json", "msgpack")
+
+# Bytes collected before they are written to the underlying stream.
+BUFFER_SIZE = 1 << 16
+
+
+def split_format_arg(argv):
+    """
+    Remove `--format=X` / `--format X` from `argv`. Returns (format, rest).
+    """
+    fmt = "text"
+    rest = []
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == "--format" and args:
+            fmt = args.pop(0)
+        elif arg.startswith("--format="):
+            fmt = arg.split("=", 1)[1]
+        else:
+            rest.append(arg)
+    if fmt not in FORMATS:
+        raise SystemExit(f"Unknown --format '{fmt}'. Expected one of {', '.join(FORMATS)}.")
+    return fmt, rest
+
+
+# ----------------------------------------------------------------
+# Records
+# ----------------------------------------------------------------
+def token_records(token_lines, positions):
+    index = 0
+    for tokens in token_lines:
+        for token_type, value in tokens:
+            line, column = positions.locate(positions.starts[index])
+            index += 1
+            yield {"kind": "token", "line": line, "column": column, "type": token_type, "value": value}
+
+
+def node_records(tree):
+    if tree is None:
+        return
+    next_id = 0
+    stack = [(tree, None, 0)]
+    while stack:
+        node, parent, depth = stack.pop()
+        node_id = next_id
+        next_id += 1
+        yield {"kind": "node", "id": node_id, "parent": parent, "depth": depth,
+               "type": node.node_type, "value": node.value}
+        for child in reversed(node.children):
+            stack.append((child, node_id, depth + 1))
+
+
+def error_records(category, messages, spans):
+    for message, span in zip(messages, spans):
+        yield {"kind": "error", "category": category, "message": message,
+               "span": list(span) if span else None}
+
+
+def lex_records(source):
+    """
+    Records for `python main.py`: every token, or the lexical error.
+    """
+    positions = interpreter.TokenPositions()
+    try:
+        token_lines = interpreter.tokenize(source, positions)
+    except ValueError as e:
+        return error_records("lexical", [str(e)], [getattr(e, "span", None)])
+    return token_records(token_lines, positions)
+
+
+def analysis_records(result):
+    """
+    Records for `python syntax.analyzer/main.py`: the parse tree of an
+    AnalysisResult (see frontend.py), or its errors.
+    """
+    if not result.ok:
+        return error_records(result.error_category, result.errors, result.spans)
+    if not result.token_lines:
+        return error_records("lexical", ["Lexical analysis encountered errors or returned no tokens."], [None])
+    return node_records(result.tree)
+
+
+# ----------------------------------------------------------------
+# MessagePack encoding (the subset the records use)
+# ----------------------------------------------------------------
+def pack(obj, out):
+    if obj is None:
+        out.append(0xC0)
+    elif obj is True:
+        out.append(0xC3)
+    elif obj is False:
+        out.append(0xC2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xFF)
+        elif 0 <= obj <= 0xFFFFFFFF:
+            out += struct.pack(">BI", 0xCE, obj)
+        elif -0x80000000 <= obj < 0:
+            out += struct.pack(">Bi", 0xD2, obj)
+        else:
+            out += struct.pack(">Bq", 0xD3, obj)
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8")
+        if len(data) < 32:
+            out.append(0xA0 | len(data))
+        elif len(data) < 0x100:
+            out += struct.pack(">BB", 0xD9, len(data))
+        elif len(data) < 0x10000:
+            out += struct.pack(">BH", 0xDA, len(data))
+        else:
+            out += struct.pack(">BI", 0xDB, len(data))
+        out += data
+    elif isinstance(obj, (list, tuple)):
+        if len(obj) < 16:
+            out.append(0x90 | len(obj))
+        else:
+            out += struct.pack(">BI", 0xDD, len(obj))
+        for item in obj:
+            pack(item, out)
+    elif isinstance(obj, dict):
+        if len(obj) < 16:
+            out.append(0x80 | len(obj))
+        else:
+            out += struct.pack(">BI", 0xDF, len(obj))
+        for key, value in obj.items():
+            pack(key, out)
+            pack(value, out)
+    else:
+        raise TypeError(f"Cannot encode {type(obj).__name__} as MessagePack.")
+
+
+# ----------------------------------------------------------------
+# Writers
+# ----------------------------------------------------------------
+class RecordWriter:
+    """
+    Encodes records into a buffer and writes it out in BUFFER_SIZE blocks.
+    """
+    def __init__(self, fmt, stream=None):
+        self.fmt = fmt
+        self.stream = stream if stream is not None else sys.stdout.buffer
+        self.buffer = bytearray()
+        self.count = 0
+        if fmt == "json":
+            self.buffer += b"["
+
+    def write(self, record):
+        if self.fmt == "msgpack":
+            pack(record, self.buffer)
+        elif self.fmt == "json":
+            if self.count:
+                self.buffer += b","
+            self.buffer += b"\n"
+            self.buffer += json.dumps(record).encode("utf-8")
+        else:
+            self.buffer += json.dumps(record).encode("utf-8")
+            self.buffer += b"\n"
+        self.count += 1
+        if len(self.buffer) >= BUFFER_SIZE:
+            self.flush()
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        self.stream.write(self.buffer)
+        self.buffer.clear()
+        self.stream.flush()
+
+    def close(self):
+        if self.fmt == "json":
+            self.buffer += b"\n]\n"
+        self.flush()
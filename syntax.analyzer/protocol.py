@@ -0,0 +1,56 @@
+"""
+Wire format shared by the analysis daemon (daemon.py) and its client
+(jargenc.py): every message is a 4-byte big-endian length followed by that
+many bytes of UTF-8 JSON. Only standard library imports, so the client
+starts fast.
+"""
+import json
+import os
+import struct
+import tempfile
+
+HEADER = struct.Struct(">I")
+
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+def default_socket_path():
+    path = os.environ.get("JARGEN_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(runtime_dir, f"jargen-{uid}.sock")
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock, message):
+    data = json.dumps(message).encode("utf-8")
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock):
+    """
+    Return the next decoded message, or None if the peer closed the
+    connection. Raises ValueError for oversized or malformed messages.
+    """
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    (size,) = HEADER.unpack(header)
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {size} bytes exceeds the {MAX_MESSAGE_BYTES} byte limit.")
+    data = _recv_exactly(sock, size)
+    if data is None:
+        return None
+    return json.loads(data.decode("utf-8"))
@@ -0,0 +1,153 @@
+"""
+Purity analysis of `trend` functions.
+
+analyze_purity() decides which functions of a resolved PROGRAM tree (see
+resolve.py) are pure: a call with the same arguments always replies the
+same value and changes nothing else. A function is pure when
+
+  - it does not `spill` or `post`,
+  - every variable it uses is its own (a parameter or a local of its
+    body), so it writes no global and no variable of an enclosing trend,
+    and no other code can change its reply. This includes `nocap`s: a
+    trend can be called before the declaration of one has run,
+  - it defines no nested `trend`, and
+  - it only calls pure functions.
+
+The last condition is solved as a greatest fixpoint over the call graph of
+inline.py: every function starts out pure and loses it when it calls one
+that is not, so recursive functions such as a naive fib stay pure.
+
+A FUNCTION_DEF annotated `@nomemo` is analyzed like any other but is left
+out of PurityReport.memoizable, which is what evaluator.py memoizes.
+"""
+from inline import build_call_graph, function_definitions, walk
+from resolve import ASSIGNMENT_OPERATORS
+
+# Annotation that keeps a pure function from being memoized.
+OPT_OUT = "nomemo"
+
+
+class PurityReport:
+    def __init__(self):
+        self.pure = set()
+        self.impure = {}  # function name -> why it is not pure
+        self.opted_out = set()
+
+    @property
+    def memoizable(self):
+        return self.pure - self.opted_out
+
+    def as_dict(self):
+        return {
+            "pure": sorted(self.pure),
+            "impure": dict(sorted(self.impure.items())),
+            "opted_out": sorted(self.opted_out),
+        }
+
+    def __str__(self):
+        lines = [f"Purity: {len(self.pure)} pure trend(s), {len(self.memoizable)} memoizable."]
+        lines.extend(f"  {name}: {reason}" for name, reason in sorted(self.impure.items()))
+        return "\n".join(lines)
+
+
+def annotations(definition):
+    """
+    Names of the `@` annotations of a FUNCTION_DEF.
+    """
+    return {child.value for child in definition.children[2:] if child.node_type == "ANNOTATION"}
+
+
+def own_bindings(definition):
+    """
+    resolve.Binding of every parameter and local of a FUNCTION_DEF.
+    """
+    bindings = set()
+    for node in walk(definition):
+        scope = getattr(node, "scope", None)
+        if scope is not None:
+            bindings.update(scope.bindings.values())
+    return bindings
+
+
+def write_targets(node):
+    """
+    The IDENTIFIER nodes assigned anywhere in `node`.
+    """
+    targets = set()
+    for current in walk(node):
+        node_type = current.node_type
+        if node_type in ("ASSIGNMENT_OP", "ASSIGN_OP", "INCDEC_OP", "POSTFIX_OP") \
+                or (node_type == "BINARY_OP" and current.value in ASSIGNMENT_OPERATORS):
+            if current.children:
+                targets.add(id(current.children[0]))
+    return targets
+
+
+def impurity(definition):
+    """
+    Why the FUNCTION_DEF `definition` is impure by itself (ignoring the
+    functions it calls), or None.
+    """
+    own = own_bindings(definition)
+    body = definition.children[1] if len(definition.children) > 1 else None
+    if body is None:
+        return None
+    writes = write_targets(body)
+    outer_read = None
+    for node in walk(body):
+        node_type = node.node_type
+        if node_type == "PRINT_STMT":
+            return "spills"
+        if node_type == "INPUT_STMT":
+            return "posts"
+        if node_type == "FUNCTION_DEF":
+            return f"defines trend '{node.value}'"
+        if node_type != "IDENTIFIER":
+            continue
+        binding = getattr(node, "variable", None)
+        if binding is None:
+            return f"uses unresolved '{node.value}'"
+        if binding in own:
+            continue
+        if id(node) in writes:
+            return f"writes outer variable '{node.value}'"
+        if outer_read is None:
+            outer_read = f"reads outer variable '{node.value}'"
+    return outer_read
+
+
+def analyze_purity(tree):
+    """
+    PurityReport of the functions of the resolved PROGRAM `tree`.
+    Functions defined more than once are never pure.
+    """
+    report = PurityReport()
+    if tree is None:
+        return report
+    definitions = function_definitions(tree)
+    for node in walk(tree):
+        if node.node_type == "FUNCTION_DEF" and node.value not in definitions:
+            report.impure[node.value] = "is defined more than once"
+
+    for name, definition in definitions.items():
+        if OPT_OUT in annotations(definition):
+            report.opted_out.add(name)
+        reason = impurity(definition)
+        if reason is None:
+            report.pure.add(name)
+        else:
+            report.impure[name] = reason
+
+    call_graph = build_call_graph(definitions)
+    changed = True
+    while changed:
+        changed = False
+        for name in sorted(report.pure):
+            for callee in sorted(call_graph[name]):
+                if callee not in report.pure:
+                    kind = "impure" if callee in definitions else "unknown"
+                    report.impure[name] = f"calls {kind} trend '{callee}'"
+                    report.pure.discard(name)
+                    changed = True
+                    break
+    return report
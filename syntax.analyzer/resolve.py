@@ -0,0 +1,304 @@
+"""
+Scope resolution over SyntaxAnalyzer parse trees.
+
+resolve_tree() walks a PROGRAM tree once, builds the nested scopes of the
+program and annotates:
+  - every IDENTIFIER node that names a variable with `binding`, a
+    (depth, slot) pair: how many scopes to walk out from the scope the
+    identifier appears in, and the index of the variable in that scope
+    (None if the name could not be resolved), and with `variable`, the
+    Binding it refers to (one object per variable);
+  - every scope-introducing node (PROGRAM, FUNCTION_DEF, BLOCK and the
+    statement lists of sus/else/forreal/talk/mood bodies and scene cases) with `scope`, the
+    Scope holding its variables in slot order.
+
+Scoping follows the JavaScript keywords the language borrows: `flex`,
+`nocap` and the typed declarations (num, char, caption, feed) are block
+scoped, `bet` is hoisted to the enclosing function (or the program), and
+parameters live in the function scope, which is shared with the
+function's body. Assigning to an undeclared name declares an
+implicit global, as the language has no required declarations
+(`number = 55.55 + 10`).
+
+Names are handled as ids of an interpreter.SymbolTable: the `symbol` of
+nodes interned by syntax_analyzer.intern_names() (pass the same table), or
+ids the resolver interns itself. Writes to `nocap` bindings, `nocap`
+without a value, redeclarations and reads of undeclared names are kept as
+diagnostics that refer to names by id; Resolution.errors renders them.
+"""
+from interpreter import SymbolTable
+
+# Operators that assign to their left operand when they show up inside an
+# expression (e.g. the first clause of a forreal header).
+ASSIGNMENT_OPERATORS = {"=", "+=", "-=", "*=", "/=", "%=", "^="}
+
+
+class Binding:
+    def __init__(self, symbol, kind, slot):
+        self.symbol = symbol
+        self.kind = kind  # flex | nocap | bet | param | implicit, or a type word
+        self.slot = slot
+
+
+class Scope:
+    def __init__(self, kind, parent=None):
+        self.kind = kind  # program | function | block
+        self.parent = parent
+        self.bindings = {}  # symbol id -> Binding
+        self.symbols = []  # symbol id per slot
+
+    def declare(self, symbol, kind):
+        binding = Binding(symbol, kind, len(self.symbols))
+        self.bindings[symbol] = binding
+        self.symbols.append(symbol)
+        return binding
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __repr__(self):
+        return f"<Scope {self.kind} slots={len(self.symbols)}>"
+
+
+class Resolution:
+    def __init__(self, symbols):
+        self.symbols = symbols
+        # (message template, symbol ids) per problem found
+        self.diagnostics = []
+        self.scopes = []
+        self.resolved = 0
+        self.implicit_globals = []  # symbol ids
+
+    @property
+    def errors(self):
+        names = self.symbols.names
+        return [f"[Resolve Error]: {template.format(*[names[symbol] for symbol in symbols])}"
+                for template, symbols in self.diagnostics]
+
+    @property
+    def ok(self):
+        return not self.diagnostics
+
+
+class Resolver:
+    def __init__(self, symbols=None):
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.resolution = Resolution(self.symbols)
+        self.scope = None
+        # (node, depth of the global scope from the use, is_write) for names
+        # that were not found in a local scope; settled once all globals are known
+        self.global_uses = []
+
+    def error(self, template, *symbols):
+        self.resolution.diagnostics.append((template, symbols))
+
+    def symbol(self, node):
+        """
+        Id of the name of `node` in this resolver's table. An id left on the
+        node by another table (an earlier analysis) is replaced.
+        """
+        symbol = getattr(node, "symbol", None)
+        names = self.symbols.names
+        if symbol is None or symbol >= len(names) or names[symbol] != node.value:
+            symbol = node.symbol = self.symbols.intern(node.value)
+        return symbol
+
+    # -- scopes ----------------------------------------------------
+    def push(self, kind, node):
+        self.scope = Scope(kind, self.scope)
+        node.scope = self.scope
+        self.resolution.scopes.append(self.scope)
+        return self.scope
+
+    def pop(self):
+        self.scope = self.scope.parent
+
+    def function_scope(self):
+        scope = self.scope
+        while scope.kind == "block":
+            scope = scope.parent
+        return scope
+
+    def declare(self, symbol, kind):
+        scope = self.function_scope() if kind == "bet" else self.scope
+        existing = scope.bindings.get(symbol)
+        if existing is not None:
+            if kind == "bet" and existing.kind == "bet":
+                return existing
+            if existing.kind != "implicit":
+                self.error("'{}' is already declared in this scope.", symbol)
+                return existing
+            existing.kind = kind
+            return existing
+        return scope.declare(symbol, kind)
+
+    def hoist(self, node):
+        """
+        Declare the `bet` variables of a function or program body up front,
+        without looking into nested functions.
+        """
+        for child in node.children:
+            if child.node_type == "FUNCTION_DEF":
+                continue
+            if child.node_type == "DECLARATION" and child.value == "bet":
+                self.declare(self.symbol(child.children[0]), "bet")
+            self.hoist(child)
+
+    # -- references ------------------------------------------------
+    def lookup(self, node, is_write):
+        symbol = self.symbol(node)
+        depth = 0
+        scope = self.scope
+        while scope.parent is not None:
+            binding = scope.bindings.get(symbol)
+            if binding is not None:
+                self.bind(node, depth, binding, is_write)
+                return
+            scope = scope.parent
+            depth += 1
+        # Globals may be declared further down (or implicitly by a later
+        # assignment), so they are settled at the end.
+        if is_write and symbol not in scope.bindings:
+            scope.declare(symbol, "implicit")
+            self.resolution.implicit_globals.append(symbol)
+        self.global_uses.append((node, depth, is_write))
+
+    def bind(self, node, depth, binding, is_write):
+        if is_write and binding.kind == "nocap":
+            self.error("Cannot assign to nocap '{}'.", binding.symbol)
+        node.binding = (depth, binding.slot)
+        node.variable = binding
+        self.resolution.resolved += 1
+
+    def settle_globals(self, program_scope):
+        for node, depth, is_write in self.global_uses:
+            binding = program_scope.bindings.get(node.symbol)
+            if binding is None:
+                node.binding = None
+                self.error("'{}' is used but never declared.", node.symbol)
+            else:
+                self.bind(node, depth, binding, is_write)
+
+    # -- walk ------------------------------------------------------
+    def visit(self, node):
+        handler = getattr(self, "visit_" + node.node_type, None)
+        if handler is not None:
+            handler(node)
+        else:
+            self.visit_children(node)
+
+    def visit_children(self, node):
+        for child in node.children:
+            self.visit(child)
+
+    def visit_PROGRAM(self, node):
+        scope = self.push("program", node)
+        self.hoist(node)
+        self.visit_children(node)
+        self.settle_globals(scope)
+        self.pop()
+
+    def visit_FUNCTION_DEF(self, node):
+        self.push("function", node)
+        params, body = node.children[0], node.children[1] if len(node.children) > 1 else None
+        for param in params.children:
+            ident = param.children[1]
+            symbol = self.symbol(ident)
+            if symbol in self.scope.bindings:
+                self.error("Duplicate parameter '{}' in trend '{}'.", symbol, self.symbol(node))
+            binding = self.declare(symbol, "param")
+            self.bind(ident, 0, binding, False)
+        if body is not None:
+            self.hoist(body)
+            # The body shares the function scope with the parameters.
+            body.scope = self.scope
+            self.visit_children(body)
+        self.pop()
+
+    def visit_BLOCK(self, node):
+        self.push("block", node)
+        self.visit_children(node)
+        self.pop()
+
+    def visit_STATEMENT_LIST(self, node):
+        self.visit_children(node)
+
+    def visit_block_body(self, node):
+        # The STATEMENT_LIST body of sus/else/forreal/talk/mood/scene is a block.
+        for child in node.children:
+            if child.node_type == "STATEMENT_LIST":
+                self.push("block", child)
+                self.visit_children(child)
+                self.pop()
+            else:
+                self.visit(child)
+
+    visit_IF_BLOCK = visit_ELSE_IF_BLOCK = visit_ELSE_BLOCK = visit_block_body
+    visit_FOR_STMT = visit_WHILE_STMT = visit_SWITCH_STMT = visit_block_body
+    visit_CASE = visit_DEFAULT_CASE = visit_block_body
+
+    def visit_DECLARATION(self, node):
+        ident = node.children[0]
+        assign = node.children[1] if len(node.children) > 1 else None
+        if assign is not None:
+            # The initializer is evaluated before the name exists.
+            for child in assign.children[1:]:
+                self.visit(child)
+        elif node.value == "nocap":
+            self.error("nocap '{}' must be given a value.", self.symbol(ident))
+
+        binding = self.declare(self.symbol(ident), node.value)
+        depth = self.depth_of(binding)
+        ident.binding = (depth, binding.slot)
+        ident.variable = binding
+        self.resolution.resolved += 1
+        if assign is not None:
+            assign.children[0].binding = ident.binding
+            assign.children[0].variable = binding
+            self.resolution.resolved += 1
+
+    def depth_of(self, binding):
+        depth = 0
+        scope = self.scope
+        while scope.bindings.get(binding.symbol) is not binding:
+            scope = scope.parent
+            depth += 1
+        return depth
+
+    def visit_ASSIGNMENT_OP(self, node):
+        for child in node.children[1:]:
+            self.visit(child)
+        self.write(node.children[0])
+
+    def visit_BINARY_OP(self, node):
+        if node.value in ASSIGNMENT_OPERATORS and node.children[0].node_type == "IDENTIFIER":
+            self.visit(node.children[1])
+            self.write(node.children[0])
+        else:
+            self.visit_children(node)
+
+    def visit_INCDEC_OP(self, node):
+        self.write(node.children[0])
+
+    visit_POSTFIX_OP = visit_INPUT_STMT = visit_INCDEC_OP
+
+    def write(self, node):
+        if node.node_type == "IDENTIFIER":
+            self.lookup(node, True)
+        else:
+            self.visit(node)
+
+    def visit_IDENTIFIER(self, node):
+        self.lookup(node, False)
+
+
+def resolve_tree(tree, symbols=None):
+    """
+    Resolve every variable of the PROGRAM `tree` (see the module docstring)
+    and return the Resolution. `symbols` is the SymbolTable the tree was
+    interned with, if any.
+    """
+    resolver = Resolver(symbols)
+    if tree is not None:
+        resolver.visit(tree)
+    return resolver.resolution
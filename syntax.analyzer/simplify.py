@@ -0,0 +1,211 @@
+"""
+Algebraic simplification and strength reduction over BINARY_OP trees.
+
+simplify_tree() rewrites the expressions of a PROGRAM tree in place with the
+rules of RULES, bottom-up, until no rule applies. A rule is a row of the
+table: the operator it applies to, a test on (left, right, kinds) and a
+rewrite of (left, right) into the replacement node. Add a Rule to RULES to
+add a simplification.
+
+Many identities only hold for numbers (`x + 0` concatenates when x is a
+string, `x - x` is NaN when x is NaN), so rules check the kind of their
+operands: "int", "float", "string", "bool" or None when unknown. Kinds come
+from literals and from the operators that produce them; the kind of a
+variable is unknown unless simplify_tree() is given a `kind_of` function
+(IDENTIFIER node -> kind), e.g. from a type inference pass.
+
+The language has no shift operators, so multiplications by a power of
+two are left alone: every other form of them costs the tree-walking
+evaluator at least as much as the multiplication.
+"""
+from inline import copy_tree, has_side_effects
+from optimize import literal_node, literal_value
+from syntax_analyzer import ParseTreeNode
+
+LITERAL_KINDS = {"INTEGER": "int", "FLOAT_NUMBER": "float", "STRING": "string", "BOOLEAN": "bool"}
+
+NUMERIC = {"int", "float"}
+
+
+class SimplifyReport:
+    def __init__(self):
+        self.rewrites = {}  # rule name -> times applied
+
+    @property
+    def total(self):
+        return sum(self.rewrites.values())
+
+    def as_dict(self):
+        return dict(self.rewrites)
+
+    def __str__(self):
+        applied = ", ".join(f"{name} x{count}" for name, count in sorted(self.rewrites.items()))
+        return f"Simplifier: {self.total} rewrite(s)" + (f" ({applied})." if applied else ".")
+
+
+# ----------------------------------------------------------------
+# Kinds
+# ----------------------------------------------------------------
+class Kinds:
+    """
+    Kind of an expression node, with variables looked up in `kind_of`.
+    """
+    def __init__(self, kind_of=None):
+        self.kind_of = kind_of
+
+    def __call__(self, node):
+        node_type = node.node_type
+        if node_type in LITERAL_KINDS:
+            return LITERAL_KINDS[node_type]
+        if node_type == "IDENTIFIER":
+            return self.kind_of(node) if self.kind_of is not None else None
+        if node_type == "POSTFIX_OP":
+            return "float"
+        if node_type != "BINARY_OP" or len(node.children) != 2:
+            return None
+
+        op = node.value
+        left, right = self(node.children[0]), self(node.children[1])
+        if op in ("==", "!=", "<", ">", "<=", ">="):
+            return "bool"
+        if op == "+":
+            if left == "string" or right == "string":
+                return "string"
+            if left in NUMERIC and right in NUMERIC:
+                return "int" if left == right == "int" else "float"
+            return None
+        if op in ("-", "*"):
+            return "int" if left == right == "int" else "float"
+        if op == "%":
+            return "int" if left == right == "int" else "float"
+        if op in ("/", "^"):
+            return "float"
+        return None
+
+
+# ----------------------------------------------------------------
+# Rule helpers
+# ----------------------------------------------------------------
+def is_number(node, value):
+    return node.node_type in ("INTEGER", "FLOAT_NUMBER") and literal_value(node) == value
+
+
+def is_trivial(node):
+    """
+    Cheap to evaluate twice, and without side effects.
+    """
+    return node.node_type == "IDENTIFIER" or node.node_type in LITERAL_KINDS
+
+
+def same_variable(left, right):
+    return left.node_type == right.node_type == "IDENTIFIER" and left.value == right.value
+
+
+def binary(op, left, right):
+    node = ParseTreeNode("BINARY_OP", op)
+    node.add_child(left)
+    node.add_child(right)
+    return node
+
+
+def constant_chain(op):
+    """
+    `(x op a) op b` with integer constants a and b and an int x.
+    """
+    def matches(left, right, kinds):
+        return (right.node_type == "INTEGER" and left.node_type == "BINARY_OP" and left.value == op
+                and left.children[1].node_type == "INTEGER" and kinds(left.children[0]) == "int")
+    return matches
+
+
+def combine_chain(combine):
+    def rewrite(left, right):
+        constant = combine(int(left.children[1].value), int(right.value))
+        return binary(left.value, left.children[0], literal_node(constant))
+    return rewrite
+
+
+class Rule:
+    def __init__(self, name, op, matches, rewrite):
+        self.name = name
+        self.op = op
+        self.matches = matches  # (left, right, kinds) -> bool
+        self.rewrite = rewrite  # (left, right) -> replacement node
+
+
+RULES = [
+    # x ^ 2 -> x * x (both coerce x to a number)
+    Rule("square", "^",
+         lambda l, r, k: is_number(r, 2) and is_trivial(l),
+         lambda l, r: binary("*", l, copy_tree(l))),
+    Rule("power-one", "^",
+         lambda l, r, k: is_number(r, 1) and k(l) in NUMERIC,
+         lambda l, r: l),
+    Rule("power-zero", "^",
+         lambda l, r, k: is_number(r, 0) and not has_side_effects(l),
+         lambda l, r: literal_node(1)),
+    Rule("multiply-one", "*",
+         lambda l, r, k: is_number(r, 1) and k(l) in NUMERIC,
+         lambda l, r: l),
+    Rule("multiply-one", "*",
+         lambda l, r, k: is_number(l, 1) and k(r) in NUMERIC,
+         lambda l, r: r),
+    Rule("divide-one", "/",
+         lambda l, r, k: is_number(r, 1) and k(l) in NUMERIC,
+         lambda l, r: l),
+    Rule("add-zero", "+",
+         lambda l, r, k: is_number(r, 0) and k(l) in NUMERIC,
+         lambda l, r: l),
+    Rule("add-zero", "+",
+         lambda l, r, k: is_number(l, 0) and k(r) in NUMERIC,
+         lambda l, r: r),
+    Rule("subtract-zero", "-",
+         lambda l, r, k: is_number(r, 0) and k(l) in NUMERIC,
+         lambda l, r: l),
+    # only for ints: NaN - NaN is NaN
+    Rule("subtract-self", "-",
+         lambda l, r, k: same_variable(l, r) and k(l) == "int",
+         lambda l, r: literal_node(0)),
+    # (x + a) + b -> x + (a + b), and likewise for - and *
+    Rule("reassociate", "+", constant_chain("+"), combine_chain(lambda a, b: a + b)),
+    Rule("reassociate", "-", constant_chain("-"), combine_chain(lambda a, b: a + b)),
+    Rule("reassociate", "*", constant_chain("*"), combine_chain(lambda a, b: a * b)),
+]
+
+RULES_BY_OP = {}
+for rule in RULES:
+    RULES_BY_OP.setdefault(rule.op, []).append(rule)
+
+
+# ----------------------------------------------------------------
+# Rewriting
+# ----------------------------------------------------------------
+def simplify(node, kinds, report):
+    """
+    Simplify `node` bottom-up and return its replacement.
+    """
+    for index, child in enumerate(node.children):
+        node.children[index] = simplify(child, kinds, report)
+
+    while node.node_type == "BINARY_OP" and len(node.children) == 2:
+        left, right = node.children
+        for rule in RULES_BY_OP.get(node.value, ()):
+            if rule.matches(left, right, kinds):
+                node = rule.rewrite(left, right)
+                report.rewrites[rule.name] = report.rewrites.get(rule.name, 0) + 1
+                break
+        else:
+            break
+    return node
+
+
+def simplify_tree(tree, kind_of=None):
+    """
+    Apply RULES to every expression of the PROGRAM `tree` in place and
+    return a SimplifyReport. `kind_of` gives the kind of a variable
+    (see the module docstring).
+    """
+    report = SimplifyReport()
+    if tree is not None:
+        simplify(tree, Kinds(kind_of), report)
+    return report
@@ -0,0 +1,112 @@
+"""
+Lowering of `mood` (SWITCH_STMT) case dispatch.
+
+A switch with `scene` cases parses as SWITCH_STMT[subject, CASE(key)...,
+DEFAULT_CASE?]. lower_switch() turns its keys into a SwitchTable that finds
+the case for a subject value without testing the cases one by one. The
+strategy depends on the keys:
+  - "jump"   : integer keys spanning a range at most 1 / JUMP_TABLE_DENSITY
+               times their number; a list indexed by `value - low`, O(1)
+  - "binary" : other all-numeric keys; binary search of the sorted keys,
+               O(log n)
+  - "hash"   : anything else (string or mixed keys); a dict, O(1)
+
+Keys match like JavaScript's `===`: 2 and 2.0 are the same key, "2" and 2
+are not, and booleans match nothing. The first of two equal keys wins.
+"""
+from bisect import bisect_left
+
+# Smallest share of the slots of a jump table that must hold a case.
+JUMP_TABLE_DENSITY = 0.5
+
+# Largest jump table built, in slots.
+JUMP_TABLE_MAX_SPAN = 1 << 16
+
+
+def case_key(literal):
+    """
+    Python value of a CASE key literal. Whole floats become ints so that
+    2 and 2.0 are one key.
+    """
+    if literal.node_type == "INTEGER":
+        return int(literal.value)
+    if literal.node_type == "FLOAT_NUMBER":
+        value = float(literal.value)
+        return int(value) if value.is_integer() else value
+    return literal.value[1:-1]
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class SwitchTable:
+    """
+    Maps subject values to targets: lookup(value) returns the target of
+    the matching key, or `default`.
+    """
+    def __init__(self, keys, targets, default=None):
+        self.default = default
+        entries = {}
+        for key, target in zip(keys, targets):
+            entries.setdefault(key, target)
+        self.size = len(entries)
+
+        numeric = all(is_number(key) for key in entries)
+        integral = numeric and all(isinstance(key, int) for key in entries)
+        if integral and entries:
+            low, high = min(entries), max(entries)
+            span = high - low + 1
+            if span <= JUMP_TABLE_MAX_SPAN and len(entries) >= span * JUMP_TABLE_DENSITY:
+                self.strategy = "jump"
+                self.low = low
+                self.table = [default] * span
+                for key, target in entries.items():
+                    self.table[key - low] = target
+                return
+        if numeric and entries:
+            self.strategy = "binary"
+            self.keys = sorted(entries)
+            self.targets = [entries[key] for key in self.keys]
+            return
+        self.strategy = "hash"
+        self.entries = entries
+
+    def lookup(self, value):
+        if self.strategy == "jump":
+            if type(value) is float and value.is_integer():
+                value = int(value)
+            if type(value) is int:
+                index = value - self.low
+                if 0 <= index < len(self.table):
+                    return self.table[index]
+            return self.default
+
+        if self.strategy == "binary":
+            if not is_number(value):
+                return self.default
+            index = bisect_left(self.keys, value)
+            if index < len(self.keys) and self.keys[index] == value:
+                return self.targets[index]
+            return self.default
+
+        if isinstance(value, bool) or isinstance(value, list):
+            return self.default
+        return self.entries.get(value, self.default)
+
+    def __repr__(self):
+        return f"<SwitchTable {self.strategy} cases={self.size}>"
+
+
+def lower_switch(node):
+    """
+    SwitchTable of the SWITCH_STMT `node` whose targets are the
+    STATEMENT_LIST bodies of its cases, or None if it has no cases.
+    """
+    cases = [child for child in node.children[1:] if child.node_type == "CASE"]
+    defaults = [child for child in node.children[1:] if child.node_type == "DEFAULT_CASE"]
+    if not cases and not defaults:
+        return None
+    keys = [case_key(case.children[0]) for case in cases]
+    bodies = [case.children[1] for case in cases]
+    return SwitchTable(keys, bodies, defaults[0].children[0] if defaults else None)
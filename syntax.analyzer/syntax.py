@@ -7,6 +7,8 @@ class Token:
       - type  : e.g., 'Keyword', 'Identifier', 'Operator', ...
       - value : the actual string, e.g., 'flex', 'sus', '=', '(', ')'
     """
+    __slots__ = ("type", "value")
+
     def __init__(self, token_type, token_value):
         self.type = token_type
         self.value = token_value
@@ -16,14 +18,18 @@ class Token:
 
 
 class Parser:
-    def __init__(self, tokens):
+    def __init__(self, tokens, positions=None):
         """
         tokens: a list of tokens (flattened) that come from the lexer.
                 Note that your lexer returns a list of lists (lines).
                 So you'd want to flatten that into a single list of Tokens
                 for convenience.
+        positions: optional interpreter.TokenPositions for the tokens; when
+                given, every SyntaxError carries the span of the token it
+                was raised at (lineno, offset, end_lineno, end_offset).
         """
         self.tokens = tokens
+        self.positions = positions
         self.position = 0  # current index in tokens
         self.current_token = self.tokens[self.position] if self.tokens else None
 
@@ -45,6 +51,19 @@ class Parser:
             return self.tokens[self.position + 1]
         return None
 
+    def error(self, message):
+        """
+        Build the SyntaxError to raise at the current token.
+        """
+        if self.positions is None or not self.tokens:
+            return SyntaxError(message)
+        index = min(self.position, len(self.tokens) - 1)
+        line, column, end_line, end_column = self.positions.span(index, self.tokens[index].value)
+        if self.position >= len(self.tokens):
+            # past the last token: point just after it
+            line, column = end_line, end_column
+        return SyntaxError(message, (None, line, column, None, end_line, end_column))
+
     def match(self, *expected_values):
         """
         Consumes the current token if its value is among expected_values,
@@ -54,7 +73,7 @@ class Parser:
         if self.current_token and self.current_token.value in expected_values:
             self.advance()
         else:
-            raise SyntaxError(
+            raise self.error(
                 f"Expected one of {expected_values}, got {self.current_token}"
             )
 
@@ -68,7 +87,7 @@ class Parser:
             self.advance()
             return token_val
         else:
-            raise SyntaxError(
+            raise self.error(
                 f"Expected token type {expected_types}, got {self.current_token}"
             )
 
@@ -121,7 +140,7 @@ class Parser:
         # handle else (which might appear in some error scenario if code is structured differently)
         if self.current_token.value == "else":
             # Typically this is caught as part of 'sus' expansions, but might be handled here if stand-alone
-            raise SyntaxError("Unexpected 'else' without preceding 'sus' block.")
+            raise self.error("Unexpected 'else' without preceding 'sus' block.")
         
         # handle loops
         if self.current_token.value == "forreal":
@@ -272,7 +291,7 @@ class Parser:
             init_expr = self.parse_expression()
             initializer = ("ForInitDecl", decl_type, id_name, init_expr)
         else:
-            raise SyntaxError("Invalid for initializer")
+            raise self.error("Invalid for initializer")
         self.match(";")
 
         # Condition expression
@@ -376,7 +395,7 @@ class Parser:
         Operand -> Integer | Float | String | Identifier
         """
         if not self.current_token:
-            raise SyntaxError("Unexpected end of tokens in parse_operand")
+            raise self.error("Unexpected end of tokens in parse_operand")
 
         token_type = self.current_token.type
         token_val = self.current_token.value
@@ -385,4 +404,4 @@ class Parser:
             self.advance()
             return (token_type, token_val)
         else:
-            raise SyntaxError(f"Unexpected token {self.current_token} in expression.")
\ No newline at end of file
+            raise self.error(f"Unexpected token {self.current_token} in expression.")
\ No newline at end of file
@@ -1,3 +1,15 @@
+# Optional instrumentation hook (see metrics.enable()). When set, its
+# start(phase) / stop(phase, started) methods are called around
+# SyntaxAnalyzer.parse_program(). Left as None it costs nothing.
+phase_timer = None
+
+
+# Words that start a declaration. The type words (num, char, caption, feed)
+# are Reserved Words to the lexer; the others are Keywords.
+DECLARATION_WORDS = {"flex", "nocap", "bet", "num", "char", "caption", "feed"}
+TYPE_WORDS = {"num", "char", "caption", "feed"}
+
+
 def flatten_token_lines(token_lines):
     flat = []
     for line in token_lines:
@@ -18,12 +30,49 @@ class ParseTreeNode:
         return f"<{self.node_type} value={self.value} children={len(self.children)}>"
 
 
+# Nodes whose value is a variable or function name.
+NAMED_NODES = {"IDENTIFIER", "FUNCTION_DEF", "FUNCTION_CALL"}
+
+
+def intern_names(tree, symbols):
+    """
+    Give every named node of `tree` a `symbol` attribute: the id of its
+    name in `symbols` (an interpreter.SymbolTable). Later passes compare
+    names by id and look the text up only when they print it.
+    """
+    if tree is None:
+        return
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node.node_type in NAMED_NODES and node.value is not None:
+            node.symbol = symbols.intern(node.value)
+        stack.extend(node.children)
+
+
 class SyntaxAnalyzer:
-    def __init__(self, token_lines):
-        self.tokens = flatten_token_lines(token_lines)
+    def __init__(self, token_lines, echo=True, positions=None):
+        self.tokens = []
+        # When echo is False, errors are only collected in self.errors.
+        self.echo = echo
+        self.reset(token_lines, positions)
+
+    def reset(self, token_lines, positions=None):
+        """
+        Prepare the analyzer for another program, reusing its token buffer
+        (see frontend.analyze_many()). `positions` is the TokenPositions
+        filled by interpreter.tokenize(), if any.
+        """
+        self.tokens.clear()
+        for line in token_lines:
+            self.tokens.extend(line)
+        self.positions = positions
         self.pos = 0
         self.current_token = self.tokens[self.pos] if self.tokens else None
         self.error_count = 0
+        self.errors = []
+        # (line, column, end_line, end_column) per error, None without positions
+        self.error_spans = []
 
     def advance(self):
         self.pos += 1
@@ -53,17 +102,45 @@ class SyntaxAnalyzer:
             )
             return None
 
+    def current_span(self):
+        """
+        Span of the current token, or an empty span right after the last
+        token once the input is exhausted. None without positions.
+        """
+        if self.positions is None or not self.tokens:
+            return None
+        if self.pos < len(self.tokens):
+            return self.positions.span(self.pos, self.current_token[1])
+        last = len(self.tokens) - 1
+        end = self.positions.span(last, self.tokens[last][1])[2:]
+        return end + end
+
     def report_error(self, message):
-        print(f"[Syntax Error @ token index {self.pos}]: {message}")
+        span = self.current_span()
+        location = f"token index {self.pos}"
+        if span is not None:
+            location += f", line {span[0]}, column {span[1]}"
+        error = f"[Syntax Error @ {location}]: {message}"
+        self.errors.append(error)
+        self.error_spans.append(span)
+        if self.echo:
+            print(error)
         self.error_count += 1
 
     def parse_program(self):
-        root = ParseTreeNode("PROGRAM")
-        stmt_list = self.parse_statement_list()
-        if stmt_list:
-            root.add_child(stmt_list)
-        else:
-            self.report_error("Empty program or invalid statements.")
+        timer = phase_timer
+        started = timer.start("parse") if timer else None
+
+        try:
+            root = ParseTreeNode("PROGRAM")
+            stmt_list = self.parse_statement_list()
+            if stmt_list:
+                root.add_child(stmt_list)
+            else:
+                self.report_error("Empty program or invalid statements.")
+        finally:
+            if timer:
+                timer.stop("parse", started)
         return root
 
     def parse_statement_list(self):
@@ -83,14 +160,15 @@ class SyntaxAnalyzer:
         ttype, tval = self.current_token
 
         if tval in {
-            "flex", "nocap", "bet", "num",  # declarations
+            "flex", "nocap", "bet",         # declarations
+            "num", "char", "caption", "feed",
             "sus",                          # if
             "forreal",                      # for
             "talk",                         # while
             "spill",                        # print
             "post",                         # input
             "mood",                         # switch
-            "trend",                        # function def
+            "trend", "@",                   # function def, annotation
             "else",                         # else / else if
             "reply",                        # return statement
             "line",
@@ -115,7 +193,7 @@ class SyntaxAnalyzer:
         ttype, tval = self.current_token
 
         # Declarations
-        if tval in {"flex", "nocap", "bet", "num"}:
+        if tval in DECLARATION_WORDS:
             return self.parse_declaration()
 
         # If
@@ -146,6 +224,10 @@ class SyntaxAnalyzer:
         if tval == "trend":
             return self.parse_function_definition()
 
+        # Annotated function definition
+        if tval == "@":
+            return self.parse_annotated_function()
+
         # Else
         if tval == "else":
             return self.parse_else_block()
@@ -235,7 +317,10 @@ class SyntaxAnalyzer:
     # ----------------------------------------------------------------
     def parse_declaration(self):
         node = ParseTreeNode("DECLARATION")
-        decl_kw = self.match(expected_type="Keyword")
+        if self.current_token and self.current_token[1] in TYPE_WORDS:
+            decl_kw = self.match(expected_type="Reserved Word")
+        else:
+            decl_kw = self.match(expected_type="Keyword")
         if not decl_kw:
             return None
         node.value = decl_kw[1] 
@@ -509,8 +594,12 @@ class SyntaxAnalyzer:
         if not lb:
             return None
 
-        stmt_list = self.parse_statement_list()
-        node.add_child(stmt_list)
+        if self.current_token and self.current_token[1] in {"scene", "else"}:
+            if not self.parse_switch_cases(node):
+                return None
+        else:
+            stmt_list = self.parse_statement_list()
+            node.add_child(stmt_list)
 
         rb = self.match(expected_value="}")
         if not rb:
@@ -518,6 +607,44 @@ class SyntaxAnalyzer:
 
         return node
 
+    def parse_switch_cases(self, switch_node):
+        """
+        `scene <literal> { ... }` cases, then an optional `else { ... }`
+        default, each added to `switch_node` as CASE(key)[literal,
+        STATEMENT_LIST] / DEFAULT_CASE[STATEMENT_LIST].
+        """
+        keys = set()
+        while self.current_token and self.current_token[1] == "scene":
+            self.advance()
+            if not self.current_token or self.current_token[0] not in {"Integer", "Float Number", "String"}:
+                self.report_error("Expected an integer, float or string after 'scene'.")
+                return False
+            ttype, tval = self.current_token
+            if (ttype, tval) in keys:
+                self.report_error(f"Duplicate scene {tval} in mood.")
+            keys.add((ttype, tval))
+            self.advance()
+
+            case_node = ParseTreeNode("CASE", tval)
+            case_node.add_child(ParseTreeNode(ttype.upper().replace(" ", "_"), tval))
+            if not self.match(expected_value="{"):
+                return False
+            case_node.add_child(self.parse_statement_list())
+            if not self.match(expected_value="}"):
+                return False
+            switch_node.add_child(case_node)
+
+        if self.current_token and self.current_token[1] == "else":
+            self.advance()
+            default_node = ParseTreeNode("DEFAULT_CASE")
+            if not self.match(expected_value="{"):
+                return False
+            default_node.add_child(self.parse_statement_list())
+            if not self.match(expected_value="}"):
+                return False
+            switch_node.add_child(default_node)
+        return True
+
     # ----------------------------------------------------------------
     # FUNCTION DEFINITION
     # ----------------------------------------------------------------
@@ -552,6 +679,28 @@ class SyntaxAnalyzer:
 
         return node
 
+    def parse_annotated_function(self):
+        """
+        `@name` annotations (one or more) before a `trend`. They become
+        ANNOTATION(name) children of the FUNCTION_DEF, after its BLOCK.
+        """
+        annotations = []
+        while self.current_token and self.current_token[1] == "@":
+            self.advance()
+            name_tok = self.match(expected_type="Identifier")
+            if not name_tok:
+                return None
+            annotations.append(ParseTreeNode("ANNOTATION", name_tok[1]))
+
+        if not self.current_token or self.current_token[1] != "trend":
+            self.report_error("Expected 'trend' after annotation.")
+            return None
+
+        node = self.parse_function_definition()
+        if node:
+            node.children.extend(annotations)
+        return node
+
     def parse_param_list(self):
         params_node = ParseTreeNode("PARAM_LIST")
 
@@ -559,8 +708,10 @@ class SyntaxAnalyzer:
 
             if self.current_token[0] == "Keyword":
                 type_tok = self.match(expected_type="Keyword")
+            elif self.current_token[1] in TYPE_WORDS:
+                type_tok = self.match(expected_type="Reserved Word")
             else:
-                self.report_error("Parameter type must be a keyword (e.g. flex, nocap, bet).")
+                self.report_error("Parameter type must be a keyword (e.g. flex, nocap, bet) or a type (num, char, caption, feed).")
                 return params_node
 
             ident_tok = self.match(expected_type="Identifier")
@@ -801,6 +952,9 @@ class SyntaxAnalyzer:
         if ttype == "Open Bracket" and tval == "[":
             return self.parse_array_initializer()
 
+        if ttype == "Function":
+            return self.parse_function_call()
+
         if ttype in {"Integer", "Float Number", "String", "Identifier"}:
             node_type = ttype.upper().replace(" ", "_") 
             primary_node = ParseTreeNode(node_type, tval)
@@ -0,0 +1,60 @@
+"""
+Tests of evaluator.py. Run from the repository root with
+
+    python -m unittest discover -s syntax.analyzer/tests
+"""
+import io
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evaluator import EvaluationError, run_tree  # noqa: E402
+from frontend import analyze_source  # noqa: E402
+
+
+def parse(source):
+    result = analyze_source(source)
+    assert result.tree is not None, result.errors
+    return result
+
+
+def empty_input():
+    raise EOFError
+
+
+class PostTest(unittest.TestCase):
+    SOURCE = "flex x = 1\npost(x)\nspill(x)\n}"
+
+    def test_post_reads_a_line(self):
+        result = parse(self.SOURCE)
+        lines = []
+        run_tree(result.tree, lines.append, lambda: "seven", symbols=result.symbols)
+        self.assertEqual(lines, ["seven"])
+
+    def test_post_without_input_is_an_evaluation_error(self):
+        result = parse(self.SOURCE)
+        with self.assertRaisesRegex(EvaluationError, "no more input"):
+            run_tree(result.tree, [].append, empty_input, symbols=result.symbols)
+
+
+class CheckOptimizedRunTest(unittest.TestCase):
+    def test_both_runs_read_the_same_input(self):
+        import main
+
+        calls = []
+
+        def read():
+            calls.append(None)
+            return "seven"
+
+        result = parse(PostTest.SOURCE)
+        with mock.patch.object(main, "stderr", io.StringIO()):
+            self.assertTrue(main.check_optimized_run(result.tree, read))
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+"""
+Tests of frontend.py. Run from the repository root with
+
+    python -m unittest discover -s syntax.analyzer/tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frontend import analyze_many, analyze_source  # noqa: E402
+
+SOURCES = [
+    "flex count = 1\nspill(count)\n}",
+    "flex total = 2\nflex count = total + 1\nspill(count)\n}",
+    "flex count = 1\nspill(count)\n}",
+    "flex x = 1..2\n}",
+]
+
+
+class AnalyzeManyTest(unittest.TestCase):
+    def test_results_match_analyze_source(self):
+        for source, result in zip(SOURCES, analyze_many(SOURCES)):
+            single = analyze_source(source)
+            self.assertEqual(result.output, single.output)
+            self.assertEqual(result.symbols.names, single.symbols.names)
+            self.assertEqual(list(result.positions.starts), list(single.positions.starts))
+
+    def test_copy_of_a_shared_result_is_independent(self):
+        results = analyze_many(SOURCES)
+        self.assertIs(results[0], results[2])
+        copy = results[2].copy()
+        copy.tree.children.clear()
+        copy.symbols.intern("other")
+        self.assertEqual(results[0].output, analyze_source(SOURCES[0]).output)
+        self.assertNotIn("other", results[0].symbols)
+
+
+if __name__ == "__main__":
+    unittest.main()
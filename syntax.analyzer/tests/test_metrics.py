@@ -0,0 +1,35 @@
+"""
+Tests of metrics.py. Run from the repository root with
+
+    python -m unittest discover -s syntax.analyzer/tests
+"""
+import os
+import subprocess
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics  # noqa: E402
+
+
+class PhaseProfileTest(unittest.TestCase):
+    @unittest.skipIf(metrics.resource is None, "needs the resource module")
+    def test_children_measures_the_cpu_time_of_a_child(self):
+        profile = metrics.PhaseProfile()
+        with profile.measure("subprocess", children=True):
+            subprocess.run([sys.executable, "-c", "sum(range(3_000_000))"], check=True)
+        self.assertGreater(profile.phases["subprocess"]["cpu"], 0)
+
+
+class RegistryTest(unittest.TestCase):
+    def test_unregistered_metrics_are_not_rendered(self):
+        counter = metrics.Counter("jargen_test_total", "A test counter.")
+        counter.inc()
+        self.assertIn("jargen_test_total 1", metrics.render())
+        metrics.unregister(counter)
+        self.assertNotIn("jargen_test_total", metrics.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
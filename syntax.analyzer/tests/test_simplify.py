@@ -0,0 +1,37 @@
+"""
+Tests of simplify.py. Run from the repository root with
+
+    python -m unittest discover -s syntax.analyzer/tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frontend import analyze_source  # noqa: E402
+from simplify import simplify_tree  # noqa: E402
+
+
+def simplified(expression):
+    result = analyze_source(f"flex x = 3\nflex y = {expression}\nspill(y)\n}}")
+    assert result.tree is not None, result.errors
+    report = simplify_tree(result.tree, lambda node: "int")
+    declaration = result.tree.children[0].children[1]
+    return declaration.children[1].children[1], report
+
+
+class RuleTest(unittest.TestCase):
+    def test_square_becomes_a_multiplication(self):
+        node, report = simplified("x ^ 2")
+        self.assertEqual((node.node_type, node.value), ("BINARY_OP", "*"))
+        self.assertEqual(report.rewrites, {"square": 1})
+
+    def test_multiplication_by_two_is_left_alone(self):
+        node, report = simplified("x * 2")
+        self.assertEqual((node.node_type, node.value), ("BINARY_OP", "*"))
+        self.assertEqual(report.total, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
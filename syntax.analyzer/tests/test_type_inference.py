@@ -0,0 +1,36 @@
+"""
+Tests of type_inference.py. Run from the repository root with
+
+    python -m unittest discover -s syntax.analyzer/tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frontend import analyze_source  # noqa: E402
+from type_inference import infer_types  # noqa: E402
+
+
+def type_errors(source):
+    result = analyze_source(source)
+    assert result.tree is not None, result.errors
+    return infer_types(result.tree, result.symbols).errors
+
+
+class DeclaredTypeTest(unittest.TestCase):
+    def test_post_into_num_is_reported(self):
+        self.assertEqual(type_errors("num x = 1\npost(x)\nspill(x)\n}"),
+                         ["[Type Error]: 'x' is declared num but assigned string."])
+
+    def test_number_into_num_is_reported(self):
+        self.assertEqual(type_errors("num x = 4\nnum y = x / 2\nspill(y)\n}"),
+                         ["[Type Error]: 'y' is declared num but assigned number."])
+
+    def test_int_into_num_is_fine(self):
+        self.assertEqual(type_errors("num x = 4\nnum y = x + 1\nspill(y)\n}"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
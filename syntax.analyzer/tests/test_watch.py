@@ -0,0 +1,64 @@
+"""
+Tests of watch.py. Run from the repository root with
+
+    python -m unittest discover -s syntax.analyzer/tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from watch import InotifyWatcher, ResultCache  # noqa: E402
+
+
+class WatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+
+class ResultCacheTest(WatchTestCase):
+    def test_stale_paths_return_the_hashed_content(self):
+        path = self.write("a.jargen", "}")
+        cache = ResultCache()
+        (stale,), removed = cache.stale_paths([path])
+        self.assertEqual(stale[0], path)
+        self.assertEqual(stale[2], b"}")
+        cache.store(path, stale[1], {})
+        self.assertEqual(cache.stale_paths([path]), ([], []))
+
+
+class InotifyWatcherTest(WatchTestCase):
+    def watcher(self):
+        try:
+            watcher = InotifyWatcher([self.root], {".jargen"})
+        except (OSError, AttributeError):
+            self.skipTest("inotify is not available")
+        self.addCleanup(watcher.close)
+        return watcher
+
+    def test_removed_directory_reports_its_sources(self):
+        inside = self.write("sub/a.jargen", "}")
+        kept = self.write("b.jargen", "}")
+        watcher = self.watcher()
+        moved = os.path.join(self.root, "moved", "a.jargen")
+        os.rename(os.path.join(self.root, "sub"), os.path.join(self.root, "moved"))
+        self.assertEqual(watcher.wait(1), {inside, moved})
+        self.assertEqual(watcher.sources, {kept, moved})
+        shutil.rmtree(os.path.join(self.root, "moved"))
+        self.assertEqual(watcher.wait(1), {moved})
+        self.assertEqual(watcher.sources, {kept})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,307 @@
+"""
+Static type inference over SyntaxAnalyzer parse trees.
+
+infer_types() resolves the variables of a PROGRAM tree (see resolve.py) and
+propagates the types of literals through declarations, assignments,
+arguments of `trend` calls into parameters, and `reply` values into the
+calls, until nothing changes. The inferred type of every variable is the
+join of everything assigned to it:
+
+    int, float      a number known to be whole / known to have a fraction
+    number          a number that may be either
+    string, bool, array
+    any             incompatible values (e.g. an int and a string)
+
+Declarations with a type word fix the type of the variable: `num` is int,
+`char` and `caption` are string (a char holds one character) and `feed` is
+array; parameters can be typed the same way. A declared variable that is
+also given a value of another type (by an assignment, an argument or
+`post`) is reported, and its type is taken to be `any` from then on so
+that no pass relies on the declaration.
+
+Every expression node is then annotated with `inferred_type` (None when
+nothing is known) and the flags `definitely_int` / `definitely_float`,
+which a backend can use to pick specialized arithmetic. kind_of() maps an
+annotated node to the kinds used by simplify.py.
+
+Values that do not fit a declared type, variables and functions that mix
+incompatible types, and arithmetic on strings, bools or arrays are
+reported as diagnostics; like resolve.py, they refer to names by symbol id
+and TypeReport.errors renders them.
+"""
+from inline import walk
+from resolve import ASSIGNMENT_OPERATORS, resolve_tree
+
+INT = "int"
+FLOAT = "float"
+NUMBER = "number"
+STRING = "string"
+BOOL = "bool"
+ARRAY = "array"
+ANY = "any"
+
+NUMERIC = {INT, FLOAT, NUMBER}
+
+DECLARED_TYPES = {"num": INT, "char": STRING, "caption": STRING, "feed": ARRAY}
+
+LITERAL_TYPES = {"INTEGER": INT, "FLOAT_NUMBER": FLOAT, "STRING": STRING, "BOOLEAN": BOOL, "ARRAY_LITERAL": ARRAY}
+
+COMPARISONS = {"==", "!=", "<", ">", "<=", ">="}
+
+# Nodes that get an inferred_type annotation.
+EXPRESSIONS = {"IDENTIFIER", "BINARY_OP", "POSTFIX_OP", "FUNCTION_CALL"} | set(LITERAL_TYPES)
+
+# inferred type -> kind understood by simplify.Kinds
+KINDS = {INT: "int", FLOAT: "float", NUMBER: "float", STRING: "string", BOOL: "bool"}
+
+
+def join(a, b):
+    """
+    Type of a variable that holds values of type `a` and of type `b`
+    (None means no value seen yet).
+    """
+    if a is None:
+        return b
+    if b is None or a == b:
+        return a
+    if a in NUMERIC and b in NUMERIC:
+        return NUMBER
+    return ANY
+
+
+def arithmetic(left, right, divide=False):
+    """
+    Type of a numeric operation on `left` and `right`.
+    """
+    if left is None or right is None:
+        return None
+    if left not in NUMERIC or right not in NUMERIC:
+        return NUMBER
+    if FLOAT in (left, right):
+        return FLOAT
+    if divide or NUMBER in (left, right):
+        return NUMBER
+    return INT
+
+
+def operation(op, left, right):
+    """
+    Type of `left op right` for the operand types `left` and `right`.
+    """
+    if op in COMPARISONS or op == "!":
+        return BOOL
+    if op in ("&&", "||"):
+        return join(left, right)
+    if op == "+":
+        if STRING in (left, right):
+            return STRING
+        return arithmetic(left, right)
+    if op in ("/", "^"):
+        return arithmetic(left, right, divide=True)
+    return arithmetic(left, right)
+
+
+def kind_of(node):
+    """
+    simplify.py kind of an annotated node (None when unknown).
+    """
+    return KINDS.get(getattr(node, "inferred_type", None))
+
+
+class TypeReport:
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.variables = {}  # resolve.Binding -> type
+        self.functions = {}  # function name -> type of its replies
+        self.annotated = 0
+        # (message template, symbol ids) per problem found
+        self.diagnostics = []
+
+    @property
+    def errors(self):
+        names = self.symbols.names
+        return [f"[Type Error]: {template.format(*[names[symbol] for symbol in symbols])}"
+                for template, symbols in self.diagnostics]
+
+    @property
+    def ok(self):
+        return not self.diagnostics
+
+    def as_dict(self):
+        names = self.symbols.names
+        return {
+            "variables": {names[binding.symbol]: kind for binding, kind in self.variables.items()},
+            "functions": dict(self.functions),
+            "errors": self.errors,
+        }
+
+    def __str__(self):
+        definite = sum(1 for kind in self.variables.values() if kind in (INT, FLOAT))
+        return (f"Types: {len(self.variables)} variable(s), {definite} definitely int or float; "
+                f"{self.annotated} expression(s) annotated, {len(self.diagnostics)} conflict(s).")
+
+
+class TypeInference:
+    def __init__(self, tree, symbols):
+        self.tree = tree
+        self.report = TypeReport(symbols)
+        self.variables = self.report.variables
+        self.returns = self.report.functions
+        self.declared = {}  # Binding -> type word (num, char, caption, feed)
+        self.conflicted = {}  # declared Binding -> first type of another kind given to it
+        self.seen = {}  # Binding -> set of types assigned to it
+        self.definitions = {}
+        self.changed = False
+
+    def error(self, template, *symbols):
+        self.report.diagnostics.append((template, symbols))
+
+    # -- types of expressions --------------------------------------
+    def type_of(self, node):
+        node_type = node.node_type
+        if node_type in LITERAL_TYPES:
+            return LITERAL_TYPES[node_type]
+        if node_type == "IDENTIFIER":
+            binding = getattr(node, "variable", None)
+            if binding in self.conflicted:
+                return ANY
+            return self.variables.get(binding)
+        if node_type == "BINARY_OP" and len(node.children) == 2:
+            left, right = node.children
+            if node.value in ASSIGNMENT_OPERATORS:
+                return self.type_of(left)
+            return operation(node.value, self.type_of(left), self.type_of(right))
+        if node_type == "POSTFIX_OP" and node.children:
+            kind = self.type_of(node.children[0])
+            return kind if kind in NUMERIC else (NUMBER if kind is not None else None)
+        if node_type == "FUNCTION_CALL":
+            return self.returns.get(node.value)
+        return None
+
+    # -- propagation -----------------------------------------------
+    def assign(self, target, kind):
+        binding = getattr(target, "variable", None)
+        if binding is None or kind is None:
+            return
+        self.seen.setdefault(binding, set()).add(kind)
+        if binding in self.declared:
+            declared = DECLARED_TYPES[self.declared[binding]]
+            if join(declared, kind) != declared and binding not in self.conflicted:
+                self.conflicted[binding] = kind
+                self.changed = True
+            return
+        joined = join(self.variables.get(binding), kind)
+        if joined != self.variables.get(binding):
+            self.variables[binding] = joined
+            self.changed = True
+
+    def assign_op(self, target, op, value):
+        kind = self.type_of(value)
+        if op != "=":
+            kind = operation(op[:-1], self.type_of(target), kind)
+        self.assign(target, kind)
+
+    def declare(self, ident, type_word):
+        binding = getattr(ident, "variable", None)
+        if binding is not None and type_word in DECLARED_TYPES:
+            self.declared[binding] = type_word
+            self.variables[binding] = DECLARED_TYPES[type_word]
+
+    def propagate(self, node, function):
+        node_type = node.node_type
+        if node_type == "FUNCTION_DEF":
+            function = node.value
+        elif node_type == "DECLARATION":
+            self.declare(node.children[0], node.value)
+        elif node_type in ("ASSIGN_OP", "ASSIGNMENT_OP") and len(node.children) == 2:
+            self.assign_op(node.children[0], node.value, node.children[1])
+        elif node_type == "BINARY_OP" and node.value in ASSIGNMENT_OPERATORS:
+            self.assign_op(node.children[0], node.value, node.children[1])
+        elif node_type in ("INCDEC_OP", "POSTFIX_OP") and node.children:
+            kind = self.type_of(node.children[0])
+            self.assign(node.children[0], kind if kind in NUMERIC else NUMBER)
+        elif node_type == "INPUT_STMT" and node.children:
+            self.assign(node.children[0], STRING)
+        elif node_type == "RETURN_STMT" and function is not None and node.children:
+            kind = join(self.returns.get(function), self.type_of(node.children[0]))
+            if kind != self.returns.get(function):
+                self.returns[function] = kind
+                self.changed = True
+        elif node_type == "FUNCTION_CALL":
+            definition = self.definitions.get(node.value)
+            if definition is not None:
+                params = definition.children[0].children
+                if len(params) == len(node.children):
+                    for param, arg in zip(params, node.children):
+                        self.assign(param.children[1], self.type_of(arg))
+
+        for child in node.children:
+            self.propagate(child, function)
+
+    # -- results ---------------------------------------------------
+    def check_assignment(self, target, value):
+        binding = getattr(target, "variable", None)
+        if self.declared.get(binding) == "char" and value.node_type == "STRING" and len(value.value) != 3:
+            self.error("'{}' is declared char but assigned a string of length "
+                       f"{len(value.value) - 2}.", binding.symbol)
+
+    def annotate(self, node):
+        node_type = node.node_type
+        if node_type in EXPRESSIONS:
+            kind = self.type_of(node)
+            node.inferred_type = kind
+            node.definitely_int = kind == INT
+            node.definitely_float = kind == FLOAT
+            self.report.annotated += 1
+            if node_type == "BINARY_OP" and node.value not in ("+", "&&", "||") \
+                    and node.value not in COMPARISONS and node.value not in ASSIGNMENT_OPERATORS:
+                for child in node.children:
+                    operand = self.type_of(child)
+                    if operand in (STRING, BOOL, ARRAY):
+                        self.error(f"Operator '{node.value}' cannot be applied to {operand}.")
+        if node_type in ("ASSIGN_OP", "ASSIGNMENT_OP") and len(node.children) == 2 and node.value == "=":
+            self.check_assignment(node.children[0], node.children[1])
+        if node_type == "FUNCTION_CALL":
+            definition = self.definitions.get(node.value)
+            if definition is not None and len(definition.children[0].children) == len(node.children):
+                for param, arg in zip(definition.children[0].children, node.children):
+                    self.check_assignment(param.children[1], arg)
+        for child in node.children:
+            self.annotate(child)
+
+    def run(self):
+        for node in walk(self.tree):
+            if node.node_type == "FUNCTION_DEF":
+                self.definitions[node.value] = node
+                for param in node.children[0].children:
+                    self.declare(param.children[1], param.children[0].value)
+
+        self.changed = True
+        while self.changed:
+            self.changed = False
+            self.propagate(self.tree, None)
+
+        for binding, kind in self.conflicted.items():
+            self.variables[binding] = ANY
+            self.error(f"'{{}}' is declared {self.declared[binding]} but assigned {kind}.", binding.symbol)
+        self.annotate(self.tree)
+        for binding, kind in self.variables.items():
+            if kind == ANY and binding not in self.declared:
+                kinds = " and ".join(sorted(self.seen.get(binding, ())))
+                self.error(f"'{{}}' is assigned both {kinds}.", binding.symbol)
+        for name, kind in self.returns.items():
+            if kind == ANY:
+                self.error("trend '{}' replies values of incompatible types.", self.report.symbols.intern(name))
+        return self.report
+
+
+def infer_types(tree, symbols=None):
+    """
+    Infer the types of the PROGRAM `tree` and annotate it (see the module
+    docstring). `symbols` is the SymbolTable the tree was interned with,
+    if any. Returns a TypeReport.
+    """
+    resolution = resolve_tree(tree, symbols)
+    if tree is None:
+        return TypeReport(resolution.symbols)
+    return TypeInference(tree, resolution.symbols).run()
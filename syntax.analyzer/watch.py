@@ -0,0 +1,291 @@
+"""
+File watching for `jargen analyze --watch`.
+
+Changes are picked up with inotify on Linux (through ctypes, no extra
+packages) and by polling (mtime, size) fingerprints everywhere else.
+Bursts of events are coalesced until the tree has been quiet for a short
+while, and a file is only re-analyzed when the hash of its content changed,
+so touching a file or saving it unchanged costs nothing. Results for
+unchanged files stay cached in memory.
+
+Every path is kept in os.path.normpath() form, like the paths that
+jargen.find_sources() yields, so a file has one key whether it was found
+by walking, named on the command line or reported by an event.
+"""
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import struct
+import time
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def walk_sources(roots, extensions):
+    """
+    Set of source files under `roots` (files named explicitly are kept
+    whatever their extension).
+    """
+    found = set()
+    for root in roots:
+        if os.path.isdir(root):
+            for directory, dirs, files in os.walk(root):
+                for name in files:
+                    if os.path.splitext(name)[1] in extensions:
+                        found.add(os.path.normpath(os.path.join(directory, name)))
+        elif os.path.exists(root):
+            found.add(os.path.normpath(root))
+    return found
+
+
+def is_within(path, directory):
+    """
+    True if `path` is `directory` or below it (`src` does not contain
+    `src2/x.jargen`).
+    """
+    path = os.path.abspath(path)
+    directory = os.path.abspath(directory)
+    return path == directory or path.startswith(directory.rstrip(os.sep) + os.sep)
+
+
+def fingerprint(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# ----------------------------------------------------------------
+# Change sources
+# ----------------------------------------------------------------
+class PollingWatcher:
+    """
+    Detects changes by comparing (mtime, size) fingerprints every
+    `interval` seconds.
+    """
+    def __init__(self, roots, extensions, interval=0.5):
+        self.roots = roots
+        self.extensions = extensions
+        self.interval = interval
+        self.fingerprints = {path: fingerprint(path) for path in walk_sources(roots, extensions)}
+
+    def wait(self, timeout=None):
+        """
+        Block until something changed (or `timeout` passed) and return the
+        set of paths that were added, modified or removed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = {path: fingerprint(path) for path in walk_sources(self.roots, self.extensions)}
+            changed = {path for path, fp in current.items() if self.fingerprints.get(path) != fp}
+            changed |= set(self.fingerprints) - set(current)
+            self.fingerprints = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval if deadline is None else min(self.interval, max(0, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Detects changes with Linux inotify. Raises OSError from the constructor
+    when inotify is not available.
+    """
+    def __init__(self, roots, extensions):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = [os.path.normpath(root) for root in roots]
+        self.extensions = extensions
+        self.directories = {}  # watch descriptor -> directory
+        self.explicit_files = set()
+        # Sources known to exist, so that removing a directory can report
+        # the files that went with it.
+        self.sources = walk_sources(self.roots, extensions)
+        for root in self.roots:
+            if os.path.isdir(root):
+                self.add_tree(root)
+            else:
+                self.explicit_files.add(root)
+                self.add_directory(os.path.dirname(root) or ".")
+
+    def add_directory(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self.directories[wd] = directory
+
+    def add_tree(self, root):
+        for directory, dirs, files in os.walk(root):
+            self.add_directory(directory)
+
+    def remove_tree(self, root):
+        """
+        Forget the directory `root` (moved away or deleted) and return the
+        sources that were in it.
+        """
+        for wd, directory in list(self.directories.items()):
+            if is_within(directory, root):
+                # A moved directory keeps its watch; a deleted one has it
+                # removed already and this just fails.
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.directories[wd]
+        removed = {path for path in self.sources if is_within(path, root)}
+        self.sources -= removed
+        return removed
+
+    def is_source(self, path):
+        if path in self.explicit_files:
+            return True
+        if not any(os.path.isdir(root) and is_within(path, root) for root in self.roots):
+            return False
+        return os.path.splitext(path)[1] in self.extensions
+
+    def read_events(self):
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    # Events were lost: report every source so they are re-checked.
+                    current = walk_sources(self.roots, self.extensions)
+                    changed |= current | self.sources
+                    self.sources = current
+                    continue
+                if mask & IN_IGNORED:
+                    self.directories.pop(wd, None)
+                    continue
+                directory = self.directories.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.normpath(os.path.join(directory, os.fsdecode(name)))
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self.add_tree(path)
+                        added = walk_sources([path], self.extensions)
+                        self.sources |= added
+                        changed |= added
+                    elif mask & (IN_MOVED_FROM | IN_DELETE):
+                        changed |= self.remove_tree(path)
+                    continue
+                if self.is_source(path):
+                    if mask & (IN_MOVED_FROM | IN_DELETE):
+                        self.sources.discard(path)
+                    else:
+                        self.sources.add(path)
+                    changed.add(path)
+
+    def wait(self, timeout=None):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        return self.read_events()
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(roots, extensions, polling=False, interval=0.5):
+    if not polling:
+        try:
+            return InotifyWatcher(roots, extensions)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(roots, extensions, interval)
+
+
+def coalesce(watcher, quiet):
+    """
+    Wait for a change, then keep collecting changes until none arrives for
+    `quiet` seconds, so that rapid successive saves are handled once.
+    """
+    changed = watcher.wait()
+    while True:
+        more = watcher.wait(quiet)
+        if not more:
+            return changed
+        changed |= more
+
+
+# ----------------------------------------------------------------
+# Content-hash result cache
+# ----------------------------------------------------------------
+def read_content(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class ResultCache:
+    """
+    Last analysis result per path, keyed by the hash of the file content.
+    """
+    def __init__(self):
+        self.entries = {}  # path -> (content hash, result)
+
+    def stale_paths(self, paths):
+        """
+        Split `paths` into (paths whose content changed, paths that were
+        removed). Changed paths come as (path, content hash, content) so
+        that the content analyzed is the one hashed. Removed paths are
+        dropped from the cache.
+        """
+        stale = []
+        removed = []
+        for path in sorted(paths):
+            data = read_content(path)
+            if data is None:
+                if self.entries.pop(path, None) is not None:
+                    removed.append(path)
+                continue
+            digest = hashlib.sha1(data).hexdigest()
+            entry = self.entries.get(path)
+            if entry is None or entry[0] != digest:
+                stale.append((path, digest, data))
+        return stale, removed
+
+    def store(self, path, digest, result):
+        self.entries[path] = (digest, result)
+
+    def results(self):
+        return [result for digest, result in self.entries.values()]